@@ -1,8 +1,20 @@
 import logic 
+import os
 import random
+import time
+import hashlib
+import itertools
+import multiprocessing
+import queue
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 #Constants and configuration
-BOARD_SIZE = 15
+# Default board size; the engine works on any size up to MAX_BOARD_SIZE
+# and reads the size from the board it is given
+BOARD_SIZE = logic.BOARD_SIZE
+MAX_BOARD_SIZE = 25
 Empty = 0
 Black = 1
 White = 2
@@ -10,6 +22,9 @@ White = 2
 # Search radius around existing pieces
 SEARCH_RADIUS = 2 
 
+# Line directions used by pattern evaluation
+DIRECTIONS = logic.DIRECTIONS
+
 # Evaluation scores (higher = better)
 SCORES = {
     "five": 10000000,      # Five in a row (win)
@@ -20,11 +35,62 @@ SCORES = {
     "live_two": 10,        # Open two
     "two_with_gap": 1      # Two with one gap
 }
+
+# Score of a won game; wins found earlier in the search score higher
+WIN_SCORE = 10 ** 9
+# Scores beyond this are wins/losses (WIN_SCORE minus the ply count)
+WIN_THRESHOLD = WIN_SCORE - MAX_BOARD_SIZE * MAX_BOARD_SIZE
+
+# Transposition table size (number of entries)
+TT_SIZE = 1 << 18
+
+# Move ordering uses the NumPy batch scorer (batch_eval.py) at nodes with
+# at least this many candidates, when NumPy is installed
+USE_BATCH_ORDERING = True
+BATCH_MIN_MOVES = 24
+
+# Stateful move ordering (MoveHeuristics): nodes with at least this much
+# depth left still order by evaluation; shallower nodes order by TT move,
+# killers and history only
+STATIC_ORDER_DEPTH = 2
+# Principal-variation search: null-window searches after the first move
+USE_PVS = True
+# Selective move generation (threats.selective_moves, find_best_move
+# selective=...): nodes facing a four or an open three only search the
+# forced replies, other nodes the best cells by local threat score.
+# SELECTIVE_WIDTHS[d - 1] cells are kept with d plies left (the last
+# entry for deeper nodes); off by default, the search is full width
+USE_SELECTIVE_SEARCH = False
+SELECTIVE_WIDTHS = (8, 10, 12, 15)
+
+# How often the parallel root search polls for stop/timeout (seconds)
+PARALLEL_POLL_S = 0.02
     
 class SearchStopped(Exception):
     #Exception raised when search is cancelled externally
     pass
 
+class SearchDeadline:
+    #Stop condition combining an optional stop_event and a wall-clock deadline
+    #Has the same is_set() interface as threading.Event
+
+    def __init__(self, stop_event=None, time_limit_ms=None):
+        self.stop_event = stop_event
+        self.deadline = None
+        if time_limit_ms is not None:
+            self.deadline = time.monotonic() + time_limit_ms / 1000.0
+
+    def is_set(self):
+        if self.stop_event is not None and self.stop_event.is_set():
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining_ms(self):
+        #Milliseconds left before the deadline (None without a time limit)
+        if self.deadline is None:
+            return None
+        return max(0.0, (self.deadline - time.monotonic()) * 1000.0)
+
 # --- Board evaluation: core of AI strength ---
 
 def evaluate_board(board, player):
@@ -41,28 +107,28 @@ def evaluate_board(board, player):
 def evaluate_player(board, player):
     #Calculate pattern scores for a player
     score = 0
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
-            if board[r][c] == player:
+    for r, row in enumerate(board):
+        for c, cell in enumerate(row):
+            if cell == player:
                 score += check_patterns(board, r, c, player)
     return score
 
 def check_patterns(board, r, c, player):
     #Check patterns around a position in all directions
-    directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
     total = 0
-    for dr, dc in directions:
-        line = get_line_pattern(board, r, c, dr, dc, player)
-        total += pattern_to_score(line)
+    for window in logic.geometry(len(board)).windows[r][c]:
+        total += PATTERN_TABLE[window_code(board, window, player)]
     return total
 
 def get_line_pattern(board, r, c, dr, dc, player):
     #Get pattern string along a direction
+    #Reference for get_line_code/window_code
+    size = len(board)
     pattern = []
     for i in range(-4, 5):
         nr = r + dr * i
         nc = c + dc * i
-        if 0 <= nr < BOARD_SIZE and 0 <= nc < BOARD_SIZE:
+        if 0 <= nr < size and 0 <= nc < size:
             if board[nr][nc] == player:
                 pattern.append(1)  # Player piece
             elif board[nr][nc] == Empty:
@@ -73,13 +139,40 @@ def get_line_pattern(board, r, c, dr, dc, player):
             pattern.append(3)  # Board edge
     return pattern
 
+def get_line_code(board, r, c, dr, dc, player):
+    #Same 9-cell window as get_line_pattern, encoded as a base-4 integer
+    #(first cell is the most significant digit)
+    window = logic.geometry(len(board)).windows[r][c][DIRECTION_INDEX[(dr, dc)]]
+    return window_code(board, window, player)
+
+DIRECTION_INDEX = {direction: d for d, direction in enumerate(DIRECTIONS)}
+# Window digit of each cell value, seen by each player (empty 0, own 1, other 2)
+WINDOW_DIGITS = {Black: (0, 1, 2), White: (0, 2, 1)}
+
+def window_code(board, window, player):
+    #get_line_code for a precomputed window (logic.BoardGeometry.windows)
+    code, cells = window
+    digits = WINDOW_DIGITS[player]
+    for r, c, weight in cells:
+        code += weight * digits[board[r][c]]
+    return code
+
 def pattern_to_score(pattern):
     #Convert pattern to score using SCORES dictionary
-    s = ''.join(map(str, pattern))
+    #Reference implementation; the search reads PATTERN_TABLE instead
+    return pattern_string_score(''.join(map(str, pattern)))
+
+def pattern_string_score(s):
+    #Score a pattern string such as '001110200'
+    pattern = pattern_string_class(s)
+    return SCORES[pattern] if pattern is not None else 0
+
+def pattern_string_class(s):
+    #SCORES key of the best pattern in a string such as '001110200', or None
     
     # Identify highest scoring patterns
-    if '11111' in s: return SCORES["five"]
-    if '011110' in s: return SCORES["live_four"]
+    if '11111' in s: return "five"
+    if '011110' in s: return "live_four"
 
     # Four with gap
     is_four_with_gap = ('01111' in s or '11110' in s or '10111' in s or '11011' in s or '11101' in s)
@@ -87,29 +180,403 @@ def pattern_to_score(pattern):
          # Simplified boundary check
          if ('01111' in s and '2' in s) or ('11110' in s and '2' in s) or \
             ('01111' in s and '3' in s) or ('11110' in s and '3' in s):
-            return SCORES["four_with_gap"]
+            return "four_with_gap"
     
-    if '01110' in s: return SCORES["live_three"]
+    if '01110' in s: return "live_three"
         
     # Three with gap
     if '01112' in s or '21110' in s or '01113' in s or '31110' in s or \
        '1011' in s or '1101' in s or '010110' in s:
-        return SCORES["three_with_gap"]
+        return "three_with_gap"
         
-    if '0110' in s: return SCORES["live_two"]
+    if '0110' in s: return "live_two"
         
     if '0112' in s or '2110' in s or '0113' in s or '3110' in s:
-        return SCORES["two_with_gap"]
+        return "two_with_gap"
     
-    return 0
+    return None
+
+# --- Precomputed pattern table ---
+
+PATTERN_WINDOWS = 4 ** 9
+
+def build_pattern_table():
+    #Score every possible 9-cell window with the string rules
+    table = array('i', [0]) * PATTERN_WINDOWS
+    for code, cells in enumerate(itertools.product('0123', repeat=9)):
+        table[code] = pattern_string_score(''.join(cells))
+    return table
+
+def code_digest(*functions):
+    #Digest of functions' bytecode and constants: changes whenever their
+    #rules are edited, so tables built from them are not reused stale
+    def parts(code):
+        # Nested code objects (generators, lambdas) by content, not address
+        return (code.co_code, tuple(parts(const) if hasattr(const, "co_code") else const
+                                    for const in code.co_consts))
+    return hashlib.sha1(repr([parts(f.__code__) for f in functions]).encode()).hexdigest()[:12]
+
+def pattern_table_path():
+    #Cache file for the current SCORES values and pattern rules
+    key = repr((sorted(SCORES.items()), code_digest(pattern_string_class, pattern_string_score)))
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__",
+                        f"pattern_table_{digest}.bin")
+
+def load_pattern_table():
+    #Load the table from the cache file, building and saving it if needed
+    path = pattern_table_path()
+    table = array('i')
+    try:
+        with open(path, 'rb') as f:
+            table.fromfile(f, PATTERN_WINDOWS)
+        return table
+    except (OSError, EOFError):
+        pass
+
+    table = build_pattern_table()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            table.tofile(f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # Read-only install: keep the table in memory only
+    return table
+
+def rebuild_pattern_table():
+    #Reload PATTERN_TABLE after SCORES has been changed
+    global PATTERN_TABLE
+    PATTERN_TABLE = load_pattern_table()
+    return PATTERN_TABLE
+
+PATTERN_TABLE = load_pattern_table()
+
+# Evaluators the search can use (find_best_move evaluator=...): the name
+# selects the pattern table read by the incremental evaluator and the
+# move ordering
+#   "pattern"  PATTERN_TABLE, built from the hand-set SCORES
+#   "linear"   learned pattern-feature weights (linear_eval.py, NumPy)
+EVALUATORS = ("pattern", "linear")
+
+def evaluation_table(evaluator=None):
+    #Pattern table of an evaluator name (None: "pattern")
+    if evaluator is None or evaluator == "pattern":
+        return PATTERN_TABLE
+    if evaluator == "linear":
+        import linear_eval
+        return linear_eval.default_table()
+    raise ValueError(f"unknown evaluator {evaluator!r}, expected one of {EVALUATORS}")
+
+class IncrementalEvaluator:
+    #Keeps evaluate_board() up to date as stones are placed and removed
+    #Stores the pattern score of every stone in every direction, so a
+    #move only re-scores the stones on the four lines through it
+    #table: pattern table to score windows with (PATTERN_TABLE if omitted)
+
+    def __init__(self, board, table=None):
+        self.board = board
+        self.table = PATTERN_TABLE if table is None else table
+        size = len(board)
+        geometry = logic.geometry(size)
+        self.windows = geometry.windows
+        self.window_cells = geometry.window_cells
+        # line_scores[r][c][d] = score of stone (r, c) along DIRECTIONS[d]
+        self.line_scores = [[[0] * len(DIRECTIONS) for _ in range(size)] for _ in range(size)]
+        self.totals = {Black: 0, White: 0}
+        for r in range(size):
+            for c in range(size):
+                if board[r][c] != Empty:
+                    for d in range(len(DIRECTIONS)):
+                        self._rescore(r, c, d)
+
+    def _rescore(self, r, c, d):
+        #Recompute one stone's score along one direction
+        player = self.board[r][c]
+        score = self.table[window_code(self.board, self.windows[r][c][d], player)]
+        self.totals[player] += score - self.line_scores[r][c][d]
+        self.line_scores[r][c][d] = score
+
+    def _rescore_neighbours(self, r, c):
+        #Re-score stones whose 9-cell windows include (r, c)
+        board = self.board
+        for nr, nc, d in self.window_cells[r][c]:
+            if board[nr][nc] != Empty:
+                self._rescore(nr, nc, d)
+
+    def make_move(self, r, c, player):
+        #Place a stone and update affected scores
+        self.board[r][c] = player
+        for d in range(len(DIRECTIONS)):
+            self._rescore(r, c, d)
+        self._rescore_neighbours(r, c)
+
+    def unmake_move(self, r, c):
+        #Remove a stone and update affected scores
+        player = self.board[r][c]
+        scores = self.line_scores[r][c]
+        for d in range(len(DIRECTIONS)):
+            self.totals[player] -= scores[d]
+            scores[d] = 0
+        self.board[r][c] = Empty
+        self._rescore_neighbours(r, c)
+
+    def evaluate(self, player):
+        #Same value as evaluate_board(board, player)
+        opponent = White if player == Black else Black
+        return self.totals[player] - self.totals[opponent]
+
+# --- Zobrist hashing and transposition table ---
+
+# Fixed seed so keys are identical in every process
+_zobrist_rng = random.Random(0x60D0)
+ZOBRIST_KEYS = [[[0, _zobrist_rng.getrandbits(64), _zobrist_rng.getrandbits(64)]
+                 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+ZOBRIST_WHITE_TO_MOVE = _zobrist_rng.getrandbits(64)
+
+def _extend_zobrist_keys(size):
+    #Keys for cells outside the default board, from a second generator so
+    #the default-size keys (and the opening book) stay unchanged
+    rng = random.Random(0x60D1)
+    for r in range(size):
+        if r == len(ZOBRIST_KEYS):
+            ZOBRIST_KEYS.append([])
+        row = ZOBRIST_KEYS[r]
+        while len(row) < size:
+            row.append([0, rng.getrandbits(64), rng.getrandbits(64)])
+
+_extend_zobrist_keys(MAX_BOARD_SIZE)
+
+# Key of the board size, so the same stones on boards of different sizes
+# (whose edge windows score differently) never share TT entries; 0 for
+# the default size, whose keys stay unchanged
+_zobrist_size_rng = random.Random(0x60D2)
+ZOBRIST_SIZE_KEYS = [0 if size == BOARD_SIZE else _zobrist_size_rng.getrandbits(64)
+                     for size in range(MAX_BOARD_SIZE + 1)]
+
+_batch_eval = None
+
+def batch_scorer():
+    #batch_eval module, or False when NumPy is not installed (imported lazily)
+    global _batch_eval
+    if _batch_eval is None:
+        try:
+            import batch_eval
+            _batch_eval = batch_eval
+        except ImportError:
+            _batch_eval = False
+    return _batch_eval
+
+_threats = None
+
+def threat_module():
+    #threats module (imported lazily, it imports this one)
+    global _threats
+    if _threats is None:
+        import threats
+        _threats = threats
+    return _threats
+
+def selective_widths(selective=None):
+    #Widths of a find_best_move selective= value: None for USE_SELECTIVE_SEARCH,
+    #True/False, or a tuple of widths per depth; None means full width
+    if selective is None:
+        selective = USE_SELECTIVE_SEARCH
+    if selective is True:
+        return SELECTIVE_WIDTHS
+    return tuple(selective) if selective else None
+
+def zobrist_key(board):
+    #Compute Zobrist key of a board from scratch (includes the board size)
+    key = ZOBRIST_SIZE_KEYS[len(board)]
+    for r, row in enumerate(board):
+        for c, cell in enumerate(row):
+            if cell != Empty:
+                key ^= ZOBRIST_KEYS[r][c][cell]
+    return key
+
+class SearchBoard:
+    #Board wrapper used by the search
+    #Keeps the incremental evaluator, Zobrist key and candidate moves in
+    #step with make/unmake
+    #table: pattern table of the evaluator (see evaluation_table)
+    #widths: selective search widths per depth (see selective_widths), or
+    #None to search every candidate
+
+    def __init__(self, board, table=None):
+        if len(board) > MAX_BOARD_SIZE:
+            raise ValueError(f"board size {len(board)} is larger than MAX_BOARD_SIZE {MAX_BOARD_SIZE}")
+        self.board = board
+        self.size = len(board)
+        self.evaluator = IncrementalEvaluator(board, table)
+        self.key = zobrist_key(board)
+        self.candidates = CandidateTracker(board)
+        self.history = []  # moves made since the search started
+        self.nodes = 0
+        self.widths = None
+
+    def make_move(self, r, c, player):
+        self.evaluator.make_move(r, c, player)
+        self.key ^= ZOBRIST_KEYS[r][c][player]
+        self.candidates.place(r, c)
+        self.history.append((r, c))
+
+    def unmake_move(self, r, c):
+        self.key ^= ZOBRIST_KEYS[r][c][self.board[r][c]]
+        self.evaluator.unmake_move(r, c)
+        self.candidates.remove(r, c)
+        self.history.pop()
+
+    def play(self, r, c, player):
+        #Game move: like make_move but it stays on the board after the
+        #search (not in history)
+        self.evaluator.make_move(r, c, player)
+        self.key ^= ZOBRIST_KEYS[r][c][player]
+        self.candidates.place(r, c)
+
+    def take_back(self, r, c):
+        #Undo play()
+        self.key ^= ZOBRIST_KEYS[r][c][self.board[r][c]]
+        self.evaluator.unmake_move(r, c)
+        self.candidates.remove(r, c)
+
+    @property
+    def ply(self):
+        return len(self.history)
+
+    @property
+    def stones(self):
+        return self.candidates.stones
+
+    def last_move(self):
+        return self.history[-1] if self.history else None
+
+    def candidate_moves(self):
+        return self.candidates.candidate_moves()
+
+    def search_moves(self, player, depth):
+        #Moves the search tries for player with depth plies left
+        moves = self.candidates.candidate_moves()
+        if self.widths is None or len(moves) <= 1:
+            return moves
+        width = self.widths[min(depth, len(self.widths)) - 1]
+        return threat_module().selective_moves(self.board, moves, player, width)
+
+    def evaluate(self, player):
+        return self.evaluator.evaluate(player)
+
+    def score_moves(self, moves, mover, player):
+        #evaluate(player) after each of mover's moves, for move ordering
+        scorer = batch_scorer() if USE_BATCH_ORDERING and len(moves) >= BATCH_MIN_MOVES else None
+        if scorer:
+            return scorer.score_moves(self.board, moves, mover, player, self.evaluator.table)
+        evaluator = self.evaluator
+        scores = []
+        for r, c in moves:
+            evaluator.make_move(r, c, mover)
+            scores.append(evaluator.evaluate(player))
+            evaluator.unmake_move(r, c)
+        return scores
+
+    def node_key(self, side_to_move):
+        #Position key including the side to move
+        return self.key ^ ZOBRIST_WHITE_TO_MOVE if side_to_move == White else self.key
+
+# Bound types stored in the transposition table
+TT_EXACT = 0
+TT_LOWER = 1  # score is a lower bound (fail high)
+TT_UPPER = 2  # score is an upper bound (fail low)
+
+def score_to_tt(score, ply):
+    #Win/loss scores are stored as distance from the node, not the root
+    if score >= WIN_THRESHOLD:
+        return score + ply
+    if score <= -WIN_THRESHOLD:
+        return score - ply
+    return score
+
+def score_from_tt(score, ply):
+    #Inverse of score_to_tt
+    if score >= WIN_THRESHOLD:
+        return score - ply
+    if score <= -WIN_THRESHOLD:
+        return score + ply
+    return score
+
+class TranspositionTable:
+    #Fixed-size hash table of searched positions
+    #Entries are (key, depth, bound, score, best_move, generation); scores
+    #are stored from the side to move's point of view
+    #Replacement: always replace entries from an older search, otherwise
+    #keep the deeper entry
+    #keep_old: probes also answer from entries of older searches; without
+    #it a search only sees its own entries, as with a cleared table
+    #widths: selective widths the entries were searched with (_search
+    #clears the table when they change)
+
+    def __init__(self, size=TT_SIZE, keep_old=True):
+        self.size = size
+        self.keep_old = keep_old
+        self.entries = [None] * size
+        self.generation = 0
+        self.widths = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        #Age existing entries so they can be replaced first
+        self.generation += 1
+
+    def probe(self, key):
+        entry = self.entries[key % self.size]
+        if entry is not None and entry[0] == key and (self.keep_old or entry[5] == self.generation):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, bound, score, best_move):
+        index = key % self.size
+        old = self.entries[index]
+        if old is not None:
+            if old[0] != key and old[5] == self.generation and old[1] > depth:
+                return
+            if old[0] != key:
+                self.overwrites += 1
+        self.entries[index] = (key, depth, bound, score, best_move, self.generation)
+        self.stores += 1
+
+    def clear(self):
+        self.entries = [None] * self.size
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def stats(self):
+        #Hit/miss counters for reporting
+        probes = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+        }
 
 def is_game_over(board):
     #Check if game has ended (win or draw)
     # Check for winner
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
-            if board[r][c] != Empty:
-                if logic.check_win(board, r, c, board[r][c]):
+    for r, row in enumerate(board):
+        for c, cell in enumerate(row):
+            if cell != Empty:
+                if logic.check_win(board, r, c, cell):
                     return True
     
     # Check for draw (full board)
@@ -124,109 +591,862 @@ def generate_candidate_moves(board):
     
     #Generate candidate moves only around existing pieces
     #Key optimization to reduce search space
+    #Returned in row-major order so the search is deterministic
     
     candidate_moves = set()
     has_piece = False
+    size = len(board)
+    neighbourhood = logic.geometry(size).neighbourhood(SEARCH_RADIUS)
     
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
+    for r in range(size):
+        for c in range(size):
             if board[r][c] != Empty:
                 has_piece = True
                 # Check surrounding SEARCH_RADIUS
-                for dr in range(-SEARCH_RADIUS, SEARCH_RADIUS + 1):
-                    for dc in range(-SEARCH_RADIUS, SEARCH_RADIUS + 1):
-                        nr, nc = r + dr, c + dc
-                        
-                        if 0 <= nr < BOARD_SIZE and 0 <= nc < BOARD_SIZE and board[nr][nc] == Empty:
-                            candidate_moves.add((nr, nc))
+                for nr, nc in neighbourhood[r][c]:
+                    if board[nr][nc] == Empty:
+                        candidate_moves.add((nr, nc))
                             
     # If board empty, start from center
     if not has_piece:
-        return [(BOARD_SIZE // 2, BOARD_SIZE // 2)]
+        return [(size // 2, size // 2)]
+
+    return sorted(candidate_moves)
+
+class CandidateTracker:
+    #Maintains generate_candidate_moves(board) incrementally
+    #neighbours[r][c] counts the stones within SEARCH_RADIUS of (r, c)
+    #(excluding the cell itself); empty cells with a non-zero count are
+    #candidates
+
+    def __init__(self, board):
+        self.board = board
+        self.size = len(board)
+        self.neighbourhood = logic.geometry(self.size).neighbourhood(SEARCH_RADIUS)
+        self.neighbours = [[0] * self.size for _ in range(self.size)]
+        self.moves = set()
+        self.stones = 0
+        for r in range(self.size):
+            for c in range(self.size):
+                if board[r][c] != Empty:
+                    self.place(r, c)
 
-    return list(candidate_moves)
+    def place(self, r, c):
+        #Update after a stone was put on (r, c)
+        board = self.board
+        neighbours = self.neighbours
+        self.stones += 1
+        self.moves.discard((r, c))
+        for nr, nc in self.neighbourhood[r][c]:
+            neighbours[nr][nc] += 1
+            if board[nr][nc] == Empty:
+                self.moves.add((nr, nc))
+
+    def remove(self, r, c):
+        #Update after the stone on (r, c) was taken off
+        neighbours = self.neighbours
+        self.stones -= 1
+        for nr, nc in self.neighbourhood[r][c]:
+            neighbours[nr][nc] -= 1
+            if neighbours[nr][nc] == 0:
+                self.moves.discard((nr, nc))
+        if neighbours[r][c] > 0:
+            self.moves.add((r, c))
+
+    def candidate_moves(self):
+        #Same moves and order as generate_candidate_moves(board)
+        if self.stones == 0:
+            return [(self.size // 2, self.size // 2)]
+        return sorted(self.moves)
+
+class MoveHeuristics:
+    #Move-ordering state kept across nodes, iterations and turns
+    #killers[ply]: the last two moves that caused a cutoff at that ply
+    #history[player][r][c]: depth^2 summed over cutoffs by that move
+
+    def __init__(self, size=BOARD_SIZE):
+        self.size = size
+        self.killers = []
+        self.history = {Black: [[0] * size for _ in range(size)],
+                        White: [[0] * size for _ in range(size)]}
+
+    def killer_moves(self, ply):
+        return self.killers[ply] if ply < len(self.killers) else ()
+
+    def record_cutoff(self, ply, move, player, depth):
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[player][move[0]][move[1]] += depth * depth
+
+    def new_search(self, size=BOARD_SIZE):
+        #Killers are per ply of one search; history is kept but aged
+        #(and reset when the board size changes)
+        if size != self.size:
+            self.clear(size)
+            return
+        self.killers = []
+        for table in self.history.values():
+            for row in table:
+                row[:] = [value >> 1 for value in row]
+
+    def clear(self, size=None):
+        self.__init__(self.size if size is None else size)
 
 # --- Minimax with Alpha-Beta pruning ---
 
-def minimax(board, depth, is_maximizing, alpha, beta, player, stop_event=None):
+def minimax(board, depth, is_maximizing, alpha, beta, player, stop_event=None, position=None, tt=None,
+            stats=None, heuristics=None, shared_alpha=None):
     
     #Minimax algorithm with Alpha-Beta pruning
+    #position: SearchBoard wrapping board (created if omitted)
+    #tt: optional TranspositionTable shared across the search
+    #stats: optional SearchStats for evaluation, cutoff and candidate counts
+    #heuristics: optional MoveHeuristics; turns on killer/history ordering
+    #below STATIC_ORDER_DEPTH and principal-variation search
+    #shared_alpha: shared best root score of the root-parallel workers
+    #(minimizing root child only); alpha is raised to it minus one before
+    #each move, as other workers improve it
     
     # Cooperative cancellation
     if stop_event is not None and stop_event.is_set():
         raise SearchStopped()
 
-    # Terminal conditions
-    if depth == 0 or is_game_over(board):
-        return evaluate_board(board, player)
+    if position is None:
+        position = SearchBoard(board)
+    position.nodes += 1
+
+    # Terminal conditions: only the last move can have ended the game
+    last_move = position.last_move()
+    if last_move is None:
+        # Called on a position with no move history
+        if is_game_over(board):
+            return position.evaluate(player)
+    else:
+        r, c = last_move
+        mover = board[r][c]
+        if logic.check_win(board, r, c, mover):
+            # Mate distance: faster wins and slower losses score higher
+            score = WIN_SCORE - position.ply
+            return score if mover == player else -score
+        if position.stones == position.size * position.size:
+            return 0  # Draw
+
+    if depth == 0:
+        if stats is not None:
+            stats.evaluations += 1
+        return position.evaluate(player)
 
     current_player = player if is_maximizing else (White if player == Black else Black)
-    candidate_moves = generate_candidate_moves(board)
-
-    # Move ordering: sort by quick evaluation
-    scored_moves = []
-    for r, c in candidate_moves:
-        board[r][c] = current_player
-        score = evaluate_board(board, player) 
-        board[r][c] = Empty
-        scored_moves.append((score, r, c))
-
-    if is_maximizing:
-        best_score = -float('inf')
-        scored_moves.sort(key=lambda x: x[0], reverse=True)  # High scores first
+
+    # Transposition table lookup (scores stored for the side to move)
+    tt_move = None
+    if tt is not None:
+        key = position.node_key(current_player)
+        entry = tt.probe(key)
+        if entry is not None:
+            tt_move = entry[4]
+            if entry[1] >= depth:
+                bound = entry[2]
+                score = score_from_tt(entry[3], position.ply)
+                if not is_maximizing:
+                    score = -score
+                    if bound != TT_EXACT:
+                        bound = TT_UPPER if bound == TT_LOWER else TT_LOWER
+                if bound == TT_EXACT:
+                    return score
+                if bound == TT_LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+    alpha_searched, beta_searched = alpha, beta
+
+    candidate_moves = position.search_moves(current_player, depth)
+    if stats is not None:
+        stats.record_node(position.ply, len(candidate_moves))
+
+    if heuristics is None or depth >= STATIC_ORDER_DEPTH:
+        # Move ordering: sort by quick evaluation
+        scores = position.score_moves(candidate_moves, current_player, player)
+        if not is_maximizing:
+            scores = [-score for score in scores]
+        if stats is not None:
+            stats.ordering_evaluations += len(candidate_moves)
     else:
-        best_score = float('inf')
-        scored_moves.sort(key=lambda x: x[0])  # Low scores first
+        # Cheap ordering: history table of the side to move
+        history = heuristics.history[current_player]
+        scores = [history[r][c] for r, c in candidate_moves]
+    scored_moves = [(score, r, c) for score, (r, c) in zip(scores, candidate_moves)]
+    scored_moves.sort(key=lambda x: x[0], reverse=True)  # Best for the side to move first
+
+    # Try the stored best move first, then the killers of this ply
+    first = []
+    if tt_move is not None:
+        first.append(tt_move)
+    if heuristics is not None:
+        first.extend(move for move in heuristics.killer_moves(position.ply) if move not in first)
+    if first:
+        front = [m for move in first for m in scored_moves if (m[1], m[2]) == move]
+        scored_moves = front + [m for m in scored_moves if (m[1], m[2]) not in first]
+
+    best_score = -float('inf') if is_maximizing else float('inf')
+    pvs = USE_PVS and heuristics is not None
     
     # Traverse and recurse
-    for score_ignored, r, c in scored_moves:
+    best_move = None
+    for move_index, (score_ignored, r, c) in enumerate(scored_moves):
         # Check cancellation before each move
         if stop_event is not None and stop_event.is_set():
             raise SearchStopped()
-        board[r][c] = current_player
-        score = minimax(board, depth - 1, not is_maximizing, alpha, beta, player, stop_event=stop_event)
-        board[r][c] = Empty
+        if shared_alpha is not None and shared_alpha.value != NO_SCORE and shared_alpha.value - 1 > alpha:
+            # Scores at or below the new alpha only need to be bounds
+            alpha = alpha_searched = shared_alpha.value - 1
+            if best_score <= alpha:
+                break  # This root move is already worse than another worker's
+        position.make_move(r, c, current_player)
+        try:
+            full_window = True
+            if pvs and move_index > 0 and beta - alpha > 1:
+                # Null window: only proves the move is no better than the
+                # best so far; re-search with the full window if it is
+                low, high = (alpha, alpha + 1) if is_maximizing else (beta - 1, beta)
+                score = minimax(board, depth - 1, not is_maximizing, low, high, player,
+                                stop_event=stop_event, position=position, tt=tt, stats=stats,
+                                heuristics=heuristics)
+                full_window = alpha < score < beta
+            if full_window:
+                score = minimax(board, depth - 1, not is_maximizing, alpha, beta, player,
+                                stop_event=stop_event, position=position, tt=tt, stats=stats,
+                                heuristics=heuristics)
+        finally:
+            position.unmake_move(r, c)
         
         if is_maximizing:
-            best_score = max(best_score, score)
+            if score > best_score:
+                best_score = score
+                best_move = (r, c)
             alpha = max(alpha, best_score)
             if best_score >= beta:
+                if stats is not None:
+                    stats.record_cutoff(move_index)
+                if heuristics is not None:
+                    heuristics.record_cutoff(position.ply, (r, c), current_player, depth)
                 break  # Beta cut-off
         else:
-            best_score = min(best_score, score)
+            if score < best_score:
+                best_score = score
+                best_move = (r, c)
             beta = min(beta, best_score)
             if best_score <= alpha:
+                if stats is not None:
+                    stats.record_cutoff(move_index)
+                if heuristics is not None:
+                    heuristics.record_cutoff(position.ply, (r, c), current_player, depth)
                 break  # Alpha cut-off
+
+    if tt is not None:
+        # Bound relative to the window actually searched, for the side to move
+        if best_score <= alpha_searched:
+            bound = TT_UPPER if is_maximizing else TT_LOWER
+        elif best_score >= beta_searched:
+            bound = TT_LOWER if is_maximizing else TT_UPPER
+        else:
+            bound = TT_EXACT
+        stored = best_score if is_maximizing else -best_score
+        tt.store(key, depth, bound, score_to_tt(stored, position.ply), best_move)
     
     return best_score
 
-def find_best_move(board, player, max_depth=3, stop_event=None):
+# --- Root search ---
+
+class SearchStats:
+    #Optional statistics of one find_best_move call
+    #Counters below "detailed" are only collected when a SearchStats is
+    #passed to find_best_move; the search skips them otherwise
+    #source: how the move was chosen ("book", "threat", "single" or "search")
+
+    def __init__(self):
+        self.nodes = 0
+        self.depth = 0  # deepest completed iteration
+        self.score = None
+        self.move = None
+        self.source = None
+        self.elapsed = 0.0
+        self.started = time.perf_counter()
+        # Progress of the running iteration
+        self.searching_depth = 0
+        self.current_move = None
+        self.current_score = None
+        # Detailed counters
+        self.evaluations = 0           # leaf evaluations
+        self.ordering_evaluations = 0  # candidate scores for move ordering
+        self.cutoffs = {}              # move index -> alpha-beta cutoffs
+        self.candidates = {}           # ply -> [nodes, candidate moves]
+        self.root_moves = []           # per root move of each iteration
+
+    def record_node(self, ply, candidate_count):
+        entry = self.candidates.get(ply)
+        if entry is None:
+            self.candidates[ply] = [1, candidate_count]
+        else:
+            entry[0] += 1
+            entry[1] += candidate_count
+
+    def record_cutoff(self, move_index):
+        self.cutoffs[move_index] = self.cutoffs.get(move_index, 0) + 1
+
+    def record_root_move(self, depth, move, score, seconds):
+        self.root_moves.append({"depth": depth, "move": move, "score": score, "seconds": seconds})
+
+    def merge(self, other):
+        #Add the detailed counters of a worker's SearchStats
+        self.evaluations += other.evaluations
+        self.ordering_evaluations += other.ordering_evaluations
+        for index, count in other.cutoffs.items():
+            self.cutoffs[index] = self.cutoffs.get(index, 0) + count
+        for ply, (nodes, count) in other.candidates.items():
+            entry = self.candidates.setdefault(ply, [0, 0])
+            entry[0] += nodes
+            entry[1] += count
+
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "nodes": self.nodes,
+            "depth": self.depth,
+            "score": self.score,
+            "move": self.move,
+            "source": self.source,
+            "elapsed": self.elapsed,
+            "nps": self.nodes_per_second(),
+            "evaluations": self.evaluations,
+            "ordering_evaluations": self.ordering_evaluations,
+            "cutoffs": dict(sorted(self.cutoffs.items())),
+            "candidates": {ply: {"nodes": n, "average": count / n}
+                           for ply, (n, count) in sorted(self.candidates.items())},
+            "root_moves": self.root_moves,
+        }
+
+def search_root(board, player, root_moves, depth, position, tt, stop, stats=None, on_move=None,
+                heuristics=None):
+    #One pass over the root moves at the given depth
+    #Each move is searched with alpha just below the best score so far:
+    #ties still get exact scores (so the move chosen is the same as with a
+    #full window) while worse moves only need to be refuted
+    #stats: passed on to minimax for the detailed counters
+    #on_move(move, score, seconds): called after each finished root move
+    #Returns ([(score, index, move), ...], completed)
+    scored = []
+    best_score = -float('inf')
+    for _, index, (r, c) in root_moves:
+        started = time.perf_counter()
+        position.make_move(r, c, player)
+        try:
+            score = minimax(board, depth - 1, False, best_score - 1, float('inf'), player,
+                            stop_event=stop, position=position, tt=tt, stats=stats, heuristics=heuristics)
+        except SearchStopped:
+            return scored, False
+        finally:
+            position.unmake_move(r, c)
+        scored.append((score, index, (r, c)))
+        best_score = max(best_score, score)
+        if on_move is not None:
+            on_move((r, c), score, time.perf_counter() - started)
+    return scored, True
+
+# Shared state of the root-parallel worker processes
+NO_SCORE = -(1 << 62)
+_root_worker = {}
+
+class _SharedFlag:
+    #is_set() view of a shared stop flag for worker processes
+    def __init__(self, flag):
+        self.flag = flag
+
+    def is_set(self):
+        return self.flag.value != 0
+
+def _init_root_worker(stop_flag, best_score):
+    #Process pool initializer: keep the shared values and a per-worker TT
+    #The TT only answers from the current search: which earlier root moves
+    #a worker happened to search must not change the move it returns
+    _root_worker["stop"] = _SharedFlag(stop_flag)
+    _root_worker["best_score"] = best_score
+    _root_worker["tt"] = TranspositionTable(keep_old=False)
+    _root_worker["heuristics"] = MoveHeuristics()
+    _root_worker["generation"] = None
+
+def _search_root_move_task(board, player, move, index, depth, detailed=False, evaluator=None, widths=None,
+                           generation=0):
+    #Search one root move in a worker process
+    #generation: RootPool search count; a new one ages the worker's TT
+    #and move heuristics like find_best_move does for the serial search
+    #Returns ((score, index, move) or None if stopped, nodes searched,
+    #seconds, SearchStats with the detailed counters or None)
+    started = time.perf_counter()
+    best_score = _root_worker["best_score"]
+    shared = best_score.value
+    # Same window as search_root
+    alpha = shared - 1 if shared != NO_SCORE else -float('inf')
+
+    stats = SearchStats() if detailed else None
+    position = SearchBoard(board, evaluation_table(evaluator))
+    position.widths = widths
+    heuristics = _root_worker["heuristics"]
+    if _root_worker["generation"] != generation:
+        _root_worker["generation"] = generation
+        _root_worker["tt"].new_search()
+        heuristics.new_search(position.size)
+    elif heuristics.size != position.size:
+        heuristics.clear(position.size)
+    position.make_move(move[0], move[1], player)
+    try:
+        score = minimax(board, depth - 1, False, alpha, float('inf'), player,
+                        stop_event=_root_worker["stop"], position=position, tt=_root_worker["tt"],
+                        stats=stats, heuristics=heuristics, shared_alpha=best_score)
+    except SearchStopped:
+        return None, position.nodes, time.perf_counter() - started, stats
+
+    with best_score.get_lock():
+        if score > best_score.value:
+            best_score.value = score
+    return (score, index, move), position.nodes, time.perf_counter() - started, stats
+
+class RootPool:
+    #Process pool for root-parallel search, with shared stop flag and best score
+
+    def __init__(self, workers):
+        ctx = multiprocessing.get_context()
+        self.stop_flag = ctx.RawValue('b', 0)
+        self.best_score = ctx.Value('q', NO_SCORE)
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                            initializer=_init_root_worker,
+                                            initargs=(self.stop_flag, self.best_score))
+        self.nodes = 0
+        self.generation = 0
+
+    def new_search(self):
+        #Start of a find_best_move search: workers age their TT and heuristics
+        self.generation += 1
+
+    def search(self, board, player, root_moves, depth, stop, stats=None, on_move=None, evaluator=None,
+               widths=None):
+        #Parallel version of search_root; cancels the workers on stop
+        #Worker counters are merged into stats; on_move is called in
+        #completion order rather than root move order
+        self.stop_flag.value = 0
+        self.best_score.value = NO_SCORE
+        snapshot = [row[:] for row in board]
+        futures = [self.executor.submit(_search_root_move_task, snapshot, player, move, index, depth,
+                                        stats is not None, evaluator, widths, self.generation)
+                   for _, index, move in root_moves]
+        scored = []
+
+        def collect(future):
+            if future.cancelled():
+                return
+            result, nodes, seconds, worker_stats = future.result()
+            self.nodes += nodes
+            if worker_stats is not None:
+                stats.merge(worker_stats)
+            if result is not None:
+                scored.append(result)
+                if on_move is not None:
+                    on_move(result[2], result[0], seconds)
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=PARALLEL_POLL_S, return_when=FIRST_COMPLETED)
+            for future in done:
+                collect(future)
+            if pending and stop.is_set():
+                self.stop_flag.value = 1
+                for future in pending:
+                    future.cancel()
+                wait(pending)
+                for future in pending:
+                    collect(future)
+                break
+        return scored, len(scored) == len(futures)
+
+    def close(self):
+        self.stop_flag.value = 1
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+def find_best_move(board, player, max_depth=3, stop_event=None, tt=None, time_limit_ms=None, workers=1,
+                   threat_search=True, use_book=True, stats=None, on_progress=None, position=None, pool=None,
+                   heuristics=None, evaluator=None, selective=None):
     
     #Find best move for AI player
     #Main decision function
+    #Iterative deepening from depth 1 to max_depth; each finished depth
+    #orders the root moves for the next one and fills the TT
+    #tt: TranspositionTable to use (a fresh TT_SIZE table if omitted);
+    #pass one in to reuse it across moves or read its hit/miss stats
+    #time_limit_ms: wall-clock budget of the whole call (the threat
+    #pre-pass gets at most THREAT_TIME_LIMIT_MS of it); on timeout or
+    #stop_event the best move of the deepest completed depth is returned
+    #workers: > 1 spreads the root moves over a process pool; returns the
+    #same move as the serial search at the same depth
+    #threat_search: run the VCF/VCT pre-pass (threats.py) first and return
+    #its move when it proves a win or finds a forced block
+    #use_book: answer early positions from the opening book (book.py)
+    #stats: optional SearchStats filled in with nodes, depth, score, time;
+    #passing one also turns on the detailed counters (evaluations, cutoffs
+    #by move index, candidates per ply, time per root move)
+    #on_progress(stats): called after every root move and every finished
+    #depth of the search, from the searching thread
+    #position: SearchBoard wrapping board to reuse instead of building one
+    #pool: RootPool to reuse instead of starting one for this call
+    #heuristics: MoveHeuristics to reuse (killers and history); a fresh
+    #one if omitted
+    #evaluator: name from EVALUATORS ("pattern" if omitted); a position
+    #passed in keeps the table it was built with
+    #selective: search only forced replies or the best cells by threat
+    #score at each node (True, False, widths per depth, or None for
+    #USE_SELECTIVE_SEARCH); see threats.selective_moves
+
+    started = time.perf_counter()
+    # One deadline for the whole call: book, threat pre-pass and search
+    stop = SearchDeadline(stop_event, time_limit_ms)
+    detailed = stats is not None
+    if stats is None:
+        stats = SearchStats()
+    stats.started = started
+    move = None
+    if use_book:
+        import book
+        move = book.book_move(board, player)
+        stats.source = "book"
     
-    best_score = -float('inf')
+    if move is None:
+        if position is None:
+            position = SearchBoard(board, evaluation_table(evaluator))
+        position.nodes = 0
+        position.widths = selective_widths(selective)
+        candidate_moves = position.search_moves(player, max_depth)
+        if len(candidate_moves) <= 1:
+            move = candidate_moves[0] if candidate_moves else None
+            stats.source = "single"
+
+    if move is None and threat_search:
+        import threats
+        remaining = stop.remaining_ms()
+        threat_limit = threats.THREAT_TIME_LIMIT_MS if remaining is None else min(threats.THREAT_TIME_LIMIT_MS,
+                                                                                  remaining)
+        move = threats.threat_move(board, player, time_limit_ms=threat_limit, stop_event=stop)
+        stats.source = "threat"
+
+    if move is None:
+        stats.source = "search"
+        move = _search(board, player, max_depth, stop, tt, workers,
+                       position, candidate_moves, stats, detailed, on_progress, pool, heuristics, evaluator)
+
+    stats.move = move
+    stats.elapsed = time.perf_counter() - started
+    return move
+
+def _search(board, player, max_depth, stop, tt, workers, position, candidate_moves,
+            stats, detailed=False, on_progress=None, pool=None, heuristics=None, evaluator=None):
+    #Iterative-deepening alpha-beta part of find_best_move
+    #stop: the SearchDeadline of the whole find_best_move call
+    if tt is None:
+        tt = TranspositionTable()
+    if tt.widths != position.widths:
+        # Scores searched with other widths are not valid for these
+        tt.clear()
+        tt.widths = position.widths
+    tt.new_search()
+    if heuristics is None:
+        heuristics = MoveHeuristics(position.size)
+    heuristics.new_search(position.size)
+    own_pool = pool is None and workers > 1
+    if own_pool:
+        pool = RootPool(workers)
+    if pool is not None:
+        pool.new_search()
+    pool_nodes = pool.nodes if pool is not None else 0
+    tree_stats = stats if detailed else None
+    base_nodes = stats.nodes
+
+    def update_nodes():
+        stats.nodes = base_nodes + position.nodes + (pool.nodes - pool_nodes if pool is not None else 0)
+        stats.elapsed = time.perf_counter() - stats.started
+
+    def on_move(move, score, seconds):
+        if detailed:
+            stats.record_root_move(stats.searching_depth, move, score, seconds)
+        if stats.current_score is None or score > stats.current_score:
+            stats.current_move = move
+            stats.current_score = score
+        if on_progress is not None:
+            update_nodes()
+            on_progress(stats)
+
+    # Root moves keep their generation index to break score ties the same
+    # way a single fixed-depth pass would
+    root_moves = [(0, i, move) for i, move in enumerate(candidate_moves)]
     best_move = None
-    
-    candidate_moves = generate_candidate_moves(board)
-    
-    # Evaluate all candidate moves
-    for r, c in candidate_moves:
-        board[r][c] = player
+    partial = []
+
+    try:
+        for depth in range(1, max_depth + 1):
+            stats.searching_depth = depth
+            stats.current_move = None
+            stats.current_score = None
+            if pool is not None:
+                scored, completed = pool.search(board, player, root_moves, depth, stop,
+                                                tree_stats, on_move, evaluator, position.widths)
+            else:
+                scored, completed = search_root(board, player, root_moves, depth, position, tt, stop,
+                                                tree_stats, on_move, heuristics)
+            if not completed:
+                if best_move is None:
+                    partial = scored
+                break
+
+            # Depth completed: best score first, ties in generation order
+            scored.sort(key=lambda x: (-x[0], x[1]))
+            root_moves = scored
+            best_move = scored[0][2]
+            stats.depth = depth
+            stats.score = scored[0][0]
+            stats.move = best_move
+            if on_progress is not None:
+                update_nodes()
+                on_progress(stats)
+
+            # A win is already forced, deeper search cannot improve on it
+            if scored[0][0] >= WIN_THRESHOLD:
+                break
+    finally:
+        if own_pool:
+            pool.close()
+        update_nodes()
+
+    if best_move is None:
+        # Stopped before depth 1 finished
+        if partial:
+            best_move = min(partial, key=lambda x: (-x[0], x[1]))[2]
+        else:
+            best_move = candidate_moves[0]
+            
+    return best_move
+
+def predict_replies(position, opponent, count):
+    #The opponent's most likely moves on a SearchBoard: best quick
+    #evaluation after the move
+    moves = position.candidate_moves()
+    scores = position.score_moves(moves, opponent, opponent)
+    ranked = sorted(zip(scores, range(len(moves)), moves), key=lambda x: (-x[0], x[1]))
+    return [move for _, _, move in ranked[:count]]
+
+def ponder(board, player, replies=3, stop_event=None, tt=None, on_answer=None, position=None,
+           **search_options):
+    #Search player's answers to the opponent's likely replies, on the
+    #opponent's time. search_options are passed on to find_best_move;
+    #sharing tt also warms it for a reply that was not predicted
+    #position: SearchBoard wrapping board to reuse
+    #on_answer(reply, answer, seconds): called for every finished answer
+    #Returns {reply: (answer, seconds)}; answers cut short by stop_event
+    #are dropped
+    opponent = White if player == Black else Black
+    if tt is None:
+        tt = TranspositionTable()
+    if position is None:
+        position = SearchBoard(board, evaluation_table(search_options.get("evaluator")))
+    answers = {}
+    for r, c in predict_replies(position, opponent, replies):
+        if stop_event is not None and stop_event.is_set():
+            break
+        if logic.check_win(board, r, c, opponent):
+            continue  # The game would be over
+        stats = SearchStats()
+        position.play(r, c, opponent)
         try:
-            score = minimax(board, max_depth - 1, False, -float('inf'), float('inf'), player, stop_event=stop_event)
-        except SearchStopped:
-            # Search cancelled, return None
+            answer = find_best_move(board, player, stop_event=stop_event, tt=tt, stats=stats,
+                                    position=position, **search_options)
+        finally:
+            position.take_back(r, c)
+        if stop_event is not None and stop_event.is_set():
+            break
+        answers[(r, c)] = (answer, stats.elapsed)
+        if on_answer is not None:
+            on_answer((r, c), answer, stats.elapsed)
+    return answers
+
+# --- Persistent engine ---
+
+class Engine:
+    #Long-lived engine for one game at a time
+    #A single worker thread owns the board, its SearchBoard (incremental
+    #evaluation, Zobrist key, candidate set), the TT and the root pool, and
+    #keeps them between turns. Moves are sent as deltas (play) instead of
+    #board snapshots.
+    #
+    #Requests are queued and handled in order. search() and ponder() return
+    #a search id; results are put on self.responses as
+    #(search_id, kind, payload):
+    #  "progress"  {"depth", "move", "nodes"} while searching
+    #  "move"      (move, SearchStats) when the search is done
+    #  "error"     exception message
+    #A search answered by pondering has stats.source == "ponder".
+
+    def __init__(self, max_depth=3, time_limit_ms=None, workers=1, ponder_replies=3, size=BOARD_SIZE,
+                 **search_options):
+        self.search_options = dict(search_options, max_depth=max_depth, time_limit_ms=time_limit_ms,
+                                   workers=workers)
+        self.ponder_replies = ponder_replies
+        self.requests = queue.Queue()
+        self.responses = queue.Queue()
+        self.search_id = 0
+        self.ponder_stats = {"hits": 0, "misses": 0, "saved": 0.0}
+        # Stop events of the running search and ponder (set from any thread)
+        self._search_stop = None
+        self._ponder_stop = None
+        # Worker thread state
+        self.board = logic.initialize_board(size)
+        self.position = SearchBoard(self.board, evaluation_table(self.search_options.get("evaluator")))
+        self.tt = TranspositionTable()
+        self.heuristics = MoveHeuristics(size)
+        self.pool = RootPool(workers) if workers > 1 else None
+        self._ponder_answers = {}
+        self._pondered = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    # Caller side
+
+    def new_game(self, size=None):
+        #Cancel everything and start from an empty board (of a new size)
+        self.cancel()
+        self._stop_ponder()
+        self.requests.put(("new_game", size))
+
+    def play(self, r, c, player):
+        #A stone was placed on (r, c)
+        self._stop_ponder()
+        self.requests.put(("play", r, c, player))
+
+    def search(self, player, **options):
+        #Search player's move; options override the search settings
+        #Returns the search id of the "move" response
+        self._stop_ponder()
+        self.search_id += 1
+        self._search_stop = threading.Event()
+        self.requests.put(("search", self.search_id, player, self._search_stop, options))
+        return self.search_id
+
+    def ponder(self, player):
+        #Search player's answers to the opponent's likely replies until the
+        #next request; a later search() of a pondered position is answered
+        #at once
+        self._stop_ponder()
+        if self.ponder_replies <= 0:
             return None
+        self.search_id += 1
+        self._ponder_stop = threading.Event()
+        self.requests.put(("ponder", self.search_id, player, self._ponder_stop))
+        return self.search_id
 
-        board[r][c] = Empty  # Undo move
-        
-        if score > best_score:
-            best_score = score
-            best_move = (r, c)
-            
-    # Safety: return first move if none found
-    if best_move is None and len(candidate_moves) > 0:
-         return candidate_moves[0]
-            
-    return best_move
\ No newline at end of file
+    def cancel(self):
+        #Stop the running search; its "move" response carries the best move
+        #found so far
+        if self._search_stop is not None:
+            self._search_stop.set()
+
+    def _stop_ponder(self):
+        if self._ponder_stop is not None:
+            self._ponder_stop.set()
+
+    def close(self):
+        self.cancel()
+        self._stop_ponder()
+        self.requests.put(("quit",))
+        self.thread.join()
+
+    # Worker side
+
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            kind = request[0]
+            if kind == "quit":
+                break
+            if kind == "new_game":
+                self._new_game(request[1])
+            elif kind == "play":
+                _, r, c, player = request
+                self.position.play(r, c, player)
+            elif kind == "search":
+                self._search(*request[1:])
+            elif kind == "ponder":
+                self._ponder(*request[1:])
+        if self.pool is not None:
+            self.pool.close()
+
+    def _new_game(self, size):
+        size = size or len(self.board)
+        self.board = logic.initialize_board(size)
+        self.position = SearchBoard(self.board, evaluation_table(self.search_options.get("evaluator")))
+        self.tt.clear()
+        self.heuristics.clear(size)
+        self._ponder_answers = {}
+        self._pondered = False
+
+    def _search(self, search_id, player, stop_event, options):
+        key = self.position.node_key(player)
+        if self._pondered:
+            self._pondered = False
+            entry = self._ponder_answers.get(key)
+            if entry is not None:
+                move, seconds = entry
+                self.ponder_stats["hits"] += 1
+                self.ponder_stats["saved"] += seconds
+                stats = SearchStats()
+                stats.move = move
+                stats.source = "ponder"
+                self.responses.put((search_id, "move", (move, stats)))
+                return
+            self.ponder_stats["misses"] += 1
+
+        def on_progress(stats):
+            self.responses.put((search_id, "progress", {"depth": stats.searching_depth,
+                                                        "move": stats.move or stats.current_move,
+                                                        "nodes": stats.nodes}))
+
+        stats = SearchStats()
+        try:
+            move = find_best_move(self.board, player, stop_event=stop_event, tt=self.tt, stats=stats,
+                                  on_progress=on_progress, position=self.position, pool=self.pool,
+                                  heuristics=self.heuristics,
+                                  **dict(self.search_options, **options))
+        except Exception as e:
+            self.responses.put((search_id, "error", str(e)))
+            return
+        self.responses.put((search_id, "move", (move, stats)))
+
+    def _ponder(self, search_id, player, stop_event):
+        answers = self._ponder_answers = {}
+        self._pondered = True
+        opponent = White if player == Black else Black
+
+        def on_answer(reply, answer, seconds):
+            # Key of the position after the reply, with player to move
+            r, c = reply
+            answers[self.position.node_key(player) ^ ZOBRIST_KEYS[r][c][opponent]] = (answer, seconds)
+
+        try:
+            ponder(self.board, player, self.ponder_replies, stop_event=stop_event, tt=self.tt,
+                   on_answer=on_answer, position=self.position, pool=self.pool, heuristics=self.heuristics,
+                   **self.search_options)
+        except Exception as e:
+            self.responses.put((search_id, "error", str(e)))
@@ -0,0 +1,241 @@
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+import Algorithm as Algo
+import logic
+
+# Bulk analysis of positions and game records
+#   python analyse.py games.jsonl --depth 3 --workers 4 --out analysis.jsonl
+#
+# Input is JSON lines, read as a stream. Each line is one of
+#   a match.py game record  {"size": 15, "opening": [[r, c], ...], "moves": [[r, c, ...], ...]}
+#   a move list             {"moves": [[r, c], ...], "size": 15}
+#   a single position       {"board": [[0, 1, 2, ...], ...], "player": 1}
+# Games are expanded into the position before every move in "moves".
+#
+# Every position gives one output line, in input order:
+#   {"line", "ply", "player", "played": [r, c]/null, "move": [r, c]/null,
+#    "score", "depth", "nodes", "ms", "source"}
+# A line that cannot be read (bad JSON, a move off the board or on an
+# occupied cell, an unsupported board size) gives {"line", "error"} in its
+# place, and a search that fails gives {"line", "ply", "error"}; the run
+# goes on.
+#
+# Positions are searched by a process pool. At most queue_size of them are
+# in flight, so memory does not grow with the input; each worker keeps its
+# transposition table and move heuristics from one position to the next.
+
+DEFAULT_SETTINGS = {"depth": 3, "time": None, "threats": True, "book": True}
+
+def other(player):
+    return Algo.White if player == Algo.Black else Algo.Black
+
+def move_cell(move, size):
+    #(r, c) of a [r, c, ...] move; ValueError if it is not on the board
+    if not isinstance(move, list) or len(move) < 2 or not all(type(x) is int for x in move[:2]):
+        raise ValueError(f"bad move {move!r}")
+    r, c = move[0], move[1]
+    if not (0 <= r < size and 0 <= c < size):
+        raise ValueError(f"move {r},{c} is off the {size}x{size} board")
+    return r, c
+
+def check_size(size):
+    if type(size) is not int or not 5 <= size <= Algo.MAX_BOARD_SIZE:
+        raise ValueError(f"board size {size!r}: sizes from 5 to {Algo.MAX_BOARD_SIZE} are supported")
+
+def game_positions(record, line):
+    #(key, board, player, played) before every move of a game record
+    #The record is checked first (ValueError); the board is then copied per
+    #position, only one game is held at a time
+    size = record.get("size", Algo.BOARD_SIZE)
+    check_size(size)
+    if not isinstance(record.get("moves"), list):
+        raise ValueError("no \"moves\" list")
+    opening = [move_cell(move, size) for move in record.get("opening", ())]
+    moves = [move_cell(move, size) for move in record["moves"]]
+    seen = set()
+    for r, c in opening + moves:
+        if (r, c) in seen:
+            raise ValueError(f"move {r},{c} is on an occupied cell")
+        seen.add((r, c))
+    return _replay(size, opening, moves, line)
+
+def _replay(size, opening, moves, line):
+    board = logic.initialize_board(size)
+    player = Algo.Black
+    for r, c in opening:
+        board[r][c] = player
+        player = other(player)
+    for ply, (r, c) in enumerate(moves):
+        yield (line, ply), [row[:] for row in board], player, (r, c)
+        board[r][c] = player
+        player = other(player)
+
+def board_position(record, line):
+    #(key, board, player, None) of a single position record
+    board = record["board"]
+    if not isinstance(board, list):
+        raise ValueError("\"board\" is not a list of rows")
+    check_size(len(board))
+    if not all(isinstance(row, list) and len(row) == len(board) for row in board):
+        raise ValueError("\"board\" is not square")
+    if not all(cell in (Algo.Empty, Algo.Black, Algo.White) and type(cell) is int for row in board for cell in row):
+        raise ValueError("\"board\" cells must be 0, 1 or 2")
+    player = record.get("player")
+    if player is None:
+        stones = sum(cell != Algo.Empty for row in board for cell in row)
+        player = Algo.Black if stones % 2 == 0 else Algo.White
+    elif player not in (Algo.Black, Algo.White) or type(player) is not int:
+        raise ValueError(f"bad player {player!r}")
+    return (line, 0), board, player, None
+
+def read_positions(lines):
+    #Positions of a stream of JSON lines (see the top of this file); a line
+    #that cannot be read gives an {"line", "error"} dict in its place
+    for line, text in enumerate(lines):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+            if not isinstance(record, dict):
+                raise ValueError("not a JSON object")
+            if "board" in record:
+                positions = [board_position(record, line)]
+            else:
+                positions = game_positions(record, line)
+        except json.JSONDecodeError as e:
+            yield {"line": line, "error": f"bad JSON: {e}"}
+            continue
+        except ValueError as e:
+            yield {"line": line, "error": str(e)}
+            continue
+        yield from positions
+
+# Per-process search state of the analysis workers
+_analysis_worker = {}
+
+def _init_analysis_worker():
+    _analysis_worker["tt"] = Algo.TranspositionTable()
+    _analysis_worker["heuristics"] = Algo.MoveHeuristics()
+
+def _analyse_task(key, board, player, played, settings):
+    #Search one position; runs in a worker (or in-process for workers=1)
+    heuristics = _analysis_worker["heuristics"]
+    if heuristics.size != len(board):
+        heuristics.clear(len(board))
+    stats = Algo.SearchStats()
+    move = Algo.find_best_move(board, player, max_depth=settings["depth"], tt=_analysis_worker["tt"],
+                               time_limit_ms=settings["time"], threat_search=settings["threats"],
+                               use_book=settings["book"], stats=stats, heuristics=heuristics)
+    return {"line": key[0], "ply": key[1], "player": player,
+            "played": list(played) if played is not None else None,
+            "move": list(move) if move is not None else None,
+            "score": stats.score, "depth": stats.depth, "nodes": stats.nodes,
+            "ms": round(stats.elapsed * 1000, 1), "source": stats.source}
+
+def _failed(key, e):
+    return {"line": key[0], "ply": key[1], "error": f"search failed: {type(e).__name__}: {e}"}
+
+def _done(result):
+    #A future that already holds result (error lines keep their place in
+    #the queue)
+    future = Future()
+    future.set_result(result)
+    return future
+
+def analyse(positions, settings=None, workers=1, queue_size=None):
+    #Analyse (key, board, player, played) positions; yields the result dicts
+    #in input order while reading positions lazily. Error dicts among the
+    #positions are passed through; a search that raises gives one too
+    #queue_size: positions in flight at once (default 4 per worker)
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    if workers <= 1:
+        _init_analysis_worker()
+        for position in positions:
+            if isinstance(position, dict):
+                yield position
+                continue
+            try:
+                yield _analyse_task(*position, settings)
+            except Exception as e:
+                yield _failed(position[0], e)
+        return
+
+    def result(key, future):
+        try:
+            return future.result()
+        except Exception as e:
+            return _failed(key, e)
+
+    queue_size = queue_size or workers * 4
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_analysis_worker) as executor:
+        for position in positions:
+            if len(pending) >= queue_size:
+                yield result(*pending.popleft())
+            if isinstance(position, dict):
+                pending.append((None, _done(position)))
+                continue
+            try:
+                future = executor.submit(_analyse_task, *position, settings)
+            except Exception as e:
+                future = _done(_failed(position[0], e))
+            pending.append((position[0], future))
+        while pending:
+            yield result(*pending.popleft())
+
+class Throughput:
+    #Positions per second over the whole run and since the last report
+
+    def __init__(self, every=5.0):
+        self.every = every
+        self.started = self.last = time.perf_counter()
+        self.count = self.last_count = 0
+
+    def add(self, log):
+        self.count += 1
+        now = time.perf_counter()
+        if log is not None and now - self.last >= self.every:
+            rate = (self.count - self.last_count) / (now - self.last)
+            log(f"{self.count} positions, {rate:.1f} positions/s")
+            self.last, self.last_count = now, self.count
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        return f"{self.count} positions in {elapsed:.1f} s, {rate:.1f} positions/s"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse positions and game records in bulk")
+    parser.add_argument("input", nargs="?", default="-", help="JSON-lines file ('-' for stdin)")
+    parser.add_argument("--out", default="-", help="write results to this file ('-' for stdout)")
+    parser.add_argument("--depth", type=int, default=DEFAULT_SETTINGS["depth"])
+    parser.add_argument("--time", type=int, default=None, help="time limit per position in ms")
+    parser.add_argument("--no-threats", action="store_true", help="turn the VCF/VCT pre-pass off")
+    parser.add_argument("--no-book", action="store_true", help="do not answer from the opening book")
+    parser.add_argument("--workers", type=int, default=1, help="positions searched in parallel")
+    parser.add_argument("--queue", type=int, default=None, help="positions in flight (default 4 per worker)")
+    args = parser.parse_args(argv)
+
+    settings = {"depth": args.depth, "time": args.time, "threats": not args.no_threats, "book": not args.no_book}
+    source = sys.stdin if args.input == "-" else open(args.input)
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    log = lambda text: print(text, file=sys.stderr, flush=True)
+    throughput = Throughput()
+    try:
+        for result in analyse(read_positions(source), settings, args.workers, args.queue):
+            out.write(json.dumps(result, separators=(",", ":")) + "\n")
+            throughput.add(log)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    log(throughput.report())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import numpy as np
+import Algorithm as Algo
+
+# Vectorised move-ordering scores: evaluate_board() after each candidate
+# move, for all candidates at once, using the same PATTERN_TABLE windows
+
+_POWERS = [4 ** (8 - i) for i in range(9)]
+# NumPy copies of the pattern tables in use: id(table) -> (table, array)
+_tables = {}
+
+def pattern_table(source=None):
+    #NumPy copy of a pattern table (Algorithm.PATTERN_TABLE if omitted,
+    #refreshed if it was rebuilt)
+    if source is None:
+        source = Algo.PATTERN_TABLE
+    cached = _tables.get(id(source))
+    if cached is None or cached[0] is not source:
+        cached = (source, np.frombuffer(source, dtype=np.int32).astype(np.int64))
+        _tables[id(source)] = cached
+    return cached[1]
+
+# Arrays are boards in their last two axes; leading axes (a batch of
+# boards) are carried along
+
+def _shifted(padded, dr, dc, k):
+    #View of a 4-padded array moved so index (r, c) reads cell (r + k*dr, c + k*dc)
+    n = padded.shape[-1] - 8
+    return padded[..., 4 + k * dr:4 + k * dr + n, 4 + k * dc:4 + k * dc + n]
+
+def _pad(arr, fill):
+    n = arr.shape[-1]
+    padded = np.full(arr.shape[:-2] + (n + 8, n + 8), fill, dtype=arr.dtype)
+    padded[..., 4:-4, 4:-4] = arr
+    return padded
+
+def window_codes(cells, player):
+    #codes[d, r, c] == get_line_code(board, r, c, dr, dc, player) for every cell
+    #cells may hold a batch of boards (codes[d, b, r, c]); player is then a
+    #scalar or an array broadcasting against cells
+    digits = np.where(cells == player, 1, np.where(cells == Algo.Empty, 0, 2))
+    padded = _pad(digits.astype(np.int64), 3)
+    codes = np.zeros((len(Algo.DIRECTIONS),) + cells.shape, dtype=np.int64)
+    for d, (dr, dc) in enumerate(Algo.DIRECTIONS):
+        for i in range(-4, 5):
+            codes[d] += _shifted(padded, dr, dc, i) * _POWERS[i + 4]
+    return codes
+
+def score_moves(board, moves, mover, player, table=None):
+    #evaluate_board(board with mover's stone on (r, c), player) for each move
+    #table: pattern table to score with (Algorithm.PATTERN_TABLE if omitted)
+    #Each placement changes one digit of the windows of the stones on its
+    #four lines, so the score change is read from the table per direction
+    #and offset for every empty cell at once
+    table = pattern_table(table)
+    cells = np.array(board, dtype=np.int64)
+    opponent = Algo.White if player == Algo.Black else Algo.Black
+
+    codes = {Algo.Black: window_codes(cells, Algo.Black), Algo.White: window_codes(cells, Algo.White)}
+    # Window codes of every stone from its owner's point of view
+    owner_codes = np.where(cells == Algo.Black, codes[Algo.Black], codes[Algo.White])
+    sign = np.where(cells == player, 1, np.where(cells == opponent, -1, 0))
+
+    base = int((table[owner_codes] * sign).sum())
+    delta = np.zeros(cells.shape, dtype=np.int64)
+    padded_sign = _pad(sign, 0)
+    # Digit the move writes into each stone's windows: 1 for the mover's
+    # stones, 2 for the other colour, 0 for empty cells (unchanged)
+    padded_digit = _pad(np.where(cells == mover, 1, np.where(cells == Algo.Empty, 0, 2)), 0)
+    # Only empty cells can be played; occupied ones get no digit change
+    playable = cells == Algo.Empty
+
+    for d, (dr, dc) in enumerate(Algo.DIRECTIONS):
+        # The new stone's own window (its centre digit goes from 0 to 1)
+        own = table[codes[mover][d] + _POWERS[4] * playable]
+        delta += own if mover == player else -own
+
+        padded_codes = _pad(owner_codes[d], 0)
+        for k in (-4, -3, -2, -1, 1, 2, 3, 4):
+            neighbour_sign = _shifted(padded_sign, dr, dc, k)
+            neighbour_codes = _shifted(padded_codes, dr, dc, k)
+            # The move sits at offset -k in the neighbour's window
+            weight = _POWERS[4 - k]
+            digit = _shifted(padded_digit, dr, dc, k) * playable
+            changed = table[neighbour_codes + digit * weight]
+            delta += (changed - table[neighbour_codes]) * neighbour_sign
+
+    rows = [r for r, _ in moves]
+    cols = [c for _, c in moves]
+    return (base + delta[rows, cols]).tolist()
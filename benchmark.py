@@ -0,0 +1,639 @@
+import os
+import sys
+import json
+import random
+import time
+import platform
+import argparse
+import itertools
+import Algorithm as Algo
+import logic
+
+# Headless benchmarks for the AI engine
+#   python benchmark.py                        micro-benchmarks
+#   python benchmark.py suite --out run.json   engine suite, results as JSON
+#   python benchmark.py compare base.json [run.json]
+#                                              flag regressions against a baseline
+#   python benchmark.py gui                    GUI frame and startup times
+#                                              (needs a display)
+
+def random_position(n_stones, seed):
+    #Board with n_stones alternating black/white stones near the centre
+    rng = random.Random(seed)
+    board = [[Algo.Empty] * Algo.BOARD_SIZE for _ in range(Algo.BOARD_SIZE)]
+    cells = [(r, c) for r in range(3, Algo.BOARD_SIZE - 3) for c in range(3, Algo.BOARD_SIZE - 3)]
+    rng.shuffle(cells)
+    for i, (r, c) in enumerate(cells[:n_stones]):
+        board[r][c] = Algo.Black if i % 2 == 0 else Algo.White
+    return board
+
+def time_call(fn, repeat):
+    #Seconds per call (best of 3 runs)
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+def verify_pattern_table():
+    #Exhaustive check: PATTERN_TABLE matches the string rules for all 4^9 windows
+    for code, cells in enumerate(itertools.product((0, 1, 2, 3), repeat=9)):
+        expected = Algo.pattern_to_score(list(cells))
+        if Algo.PATTERN_TABLE[code] != expected:
+            raise AssertionError(f"window {cells}: table {Algo.PATTERN_TABLE[code]} != {expected}")
+    return Algo.PATTERN_WINDOWS
+
+def string_evaluate_board(board, player):
+    #evaluate_board through the old string-matching path
+    opponent = Algo.White if player == Algo.Black else Algo.Black
+    score = 0
+    for r in range(Algo.BOARD_SIZE):
+        for c in range(Algo.BOARD_SIZE):
+            stone = board[r][c]
+            if stone != Algo.Empty:
+                total = 0
+                for dr, dc in Algo.DIRECTIONS:
+                    total += Algo.pattern_to_score(Algo.get_line_pattern(board, r, c, dr, dc, stone))
+                score += total if stone == player else -total
+    return score
+
+def bench_pattern_scoring():
+    #String matching vs table lookup, per window and per evaluate_board call
+    print(f"pattern table: {verify_pattern_table()} windows identical to pattern_to_score")
+
+    board = random_position(40, 1)
+    windows = [(r, c, dr, dc, board[r][c]) for r in range(Algo.BOARD_SIZE) for c in range(Algo.BOARD_SIZE)
+               if board[r][c] != Algo.Empty for dr, dc in Algo.DIRECTIONS]
+
+    def string_windows():
+        for r, c, dr, dc, p in windows:
+            Algo.pattern_to_score(Algo.get_line_pattern(board, r, c, dr, dc, p))
+
+    def table_windows():
+        table = Algo.PATTERN_TABLE
+        for r, c, dr, dc, p in windows:
+            table[Algo.get_line_code(board, r, c, dr, dc, p)]
+
+    t_string = time_call(string_windows, 20) / len(windows)
+    t_table = time_call(table_windows, 20) / len(windows)
+    print(f"  per window:         string {t_string * 1e6:8.2f} us   table {t_table * 1e6:8.2f} us"
+          f"   x{t_string / t_table:.1f}")
+
+    assert string_evaluate_board(board, Algo.Black) == Algo.evaluate_board(board, Algo.Black)
+    t_string = time_call(lambda: string_evaluate_board(board, Algo.Black), 10)
+    t_table = time_call(lambda: Algo.evaluate_board(board, Algo.Black), 10)
+    print(f"  per evaluate_board: string {t_string * 1e3:8.2f} ms   table {t_table * 1e3:8.2f} ms"
+          f"   x{t_string / t_table:.1f}")
+
+def bench_bitboard():
+    #List board vs BitBoard: check_win, is_board_full, is_game_over
+    print("bitboard vs list board (us per call):")
+    for n_stones in (10, 30, 60):
+        board = random_position(n_stones, n_stones)
+        bb = logic.BitBoard.from_list(board)
+        stones = [(r, c, board[r][c]) for r in range(Algo.BOARD_SIZE) for c in range(Algo.BOARD_SIZE)
+                  if board[r][c] != Algo.Empty]
+
+        def list_check_win():
+            for r, c, p in stones:
+                logic.check_win(board, r, c, p)
+
+        def bit_check_win():
+            for r, c, p in stones:
+                bb.check_win(r, c, p)
+
+        rows = [
+            ("check_win", time_call(list_check_win, 20) / len(stones), time_call(bit_check_win, 20) / len(stones)),
+            ("is_board_full", time_call(lambda: logic.is_board_full(board), 200), time_call(bb.is_board_full, 200)),
+            ("is_game_over", time_call(lambda: Algo.is_game_over(board), 20), time_call(bb.is_game_over, 200)),
+        ]
+        for name, t_list, t_bit in rows:
+            print(f"  {n_stones:3d} stones {name:14s} list {t_list * 1e6:9.2f}   bitboard {t_bit * 1e6:7.2f}"
+                  f"   x{t_list / t_bit:.1f}")
+
+def midgame_positions():
+    #Fixed set of midgame positions (side to move, board)
+    return [(Algo.Black if n % 2 == 0 else Algo.White, random_position(n, seed))
+            for seed, n in enumerate((16, 20, 24, 28, 32))]
+
+def bench_search_nodes(depth=3):
+    #Node throughput of a fixed-depth alpha-beta search on midgame positions
+    print(f"search nodes/s at depth {depth}:")
+    total_nodes = 0
+    total_time = 0.0
+    for i, (player, board) in enumerate(midgame_positions()):
+        position = Algo.SearchBoard(board)
+        start = time.perf_counter()
+        Algo.minimax(board, depth, True, -float('inf'), float('inf'), player,
+                     position=position, tt=Algo.TranspositionTable())
+        elapsed = time.perf_counter() - start
+        total_nodes += position.nodes
+        total_time += elapsed
+        print(f"  position {i}: {position.nodes:7d} nodes {elapsed:7.2f} s {position.nodes / elapsed:9.0f} nodes/s")
+    print(f"  total:      {total_nodes:7d} nodes {total_time:7.2f} s {total_nodes / total_time:9.0f} nodes/s")
+
+def bench_move_ordering():
+    #Per-candidate evaluator loop vs NumPy batch scoring of all candidates
+    scorer = Algo.batch_scorer()
+    if not scorer:
+        print("move ordering: NumPy not installed, batch scorer skipped")
+        return
+    print("move ordering, all candidates of one node (ms):")
+    for n_stones in (2, 6, 12, 24, 40, 60):
+        board = random_position(n_stones, n_stones)
+        position = Algo.SearchBoard(board)
+        moves = position.candidate_moves()
+        evaluator = position.evaluator
+
+        def loop_scores():
+            scores = []
+            for r, c in moves:
+                evaluator.make_move(r, c, Algo.Black)
+                scores.append(evaluator.evaluate(Algo.Black))
+                evaluator.unmake_move(r, c)
+            return scores
+
+        assert loop_scores() == scorer.score_moves(board, moves, Algo.Black, Algo.Black)
+        t_loop = time_call(loop_scores, 5)
+        t_batch = time_call(lambda: scorer.score_moves(board, moves, Algo.Black, Algo.Black), 5)
+        print(f"  {n_stones:3d} stones {len(moves):4d} candidates   loop {t_loop * 1e3:7.2f}"
+              f"   batch {t_batch * 1e3:7.2f}   x{t_loop / t_batch:.1f}")
+
+def bench_threat_search(depth=3):
+    #find_best_move with and without the VCF/VCT pre-pass
+    import threats
+    threats.reset_stats()
+    print(f"threat-space pre-pass at depth {depth}:")
+    for i, (player, board) in enumerate(midgame_positions()):
+        start = time.perf_counter()
+        full = Algo.find_best_move(board, player, max_depth=depth, threat_search=False)
+        t_full = time.perf_counter() - start
+        start = time.perf_counter()
+        move = Algo.find_best_move(board, player, max_depth=depth)
+        t_threat = time.perf_counter() - start
+        print(f"  position {i}: search {t_full:6.2f} s {full}   with pre-pass {t_threat:6.2f} s {move}")
+    print(f"  {threats.stats()}")
+
+def bench_parallel(depth=3, max_workers=None):
+    #Root-parallel find_best_move speedup from 1 to N workers
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+
+    print(f"root-parallel find_best_move at depth {depth}:")
+    positions = midgame_positions()
+    serial_moves = None
+    serial_time = None
+    for workers in counts:
+        start = time.perf_counter()
+        moves = [Algo.find_best_move(board, player, max_depth=depth, workers=workers, threat_search=False)
+                 for player, board in positions]
+        elapsed = time.perf_counter() - start
+        if serial_moves is None:
+            serial_moves, serial_time = moves, elapsed
+        same = "same moves" if moves == serial_moves else f"DIFFERENT MOVES {moves}"
+        print(f"  {workers:3d} workers: {elapsed:7.2f} s   x{serial_time / elapsed:.2f}   {same}")
+
+def bench_move_heuristics(depth=4):
+    #Evaluation ordering everywhere vs killer/history ordering with PVS:
+    #nodes, evaluations and time to each depth of iterative deepening
+    positions = {name: entry for name, entry in benchmark_corpus().items()
+                 if name.startswith(("tactical", "midgame"))}
+    print(f"move ordering heuristics, iterative deepening to depth {depth}:")
+    results = {}
+    for label, make in (("evaluation", lambda: None), ("killer/history", Algo.MoveHeuristics)):
+        nodes = evaluations = 0
+        to_depth = [0.0] * depth
+        best = {}
+        for name, (player, board) in positions.items():
+            position = Algo.SearchBoard([row[:] for row in board])
+            tt = Algo.TranspositionTable()
+            stats = Algo.SearchStats()
+            heuristics = make()
+            root_moves = [(0, i, move) for i, move in enumerate(position.candidate_moves())]
+            start = time.perf_counter()
+            for d in range(1, depth + 1):
+                tt.new_search()
+                scored, _ = Algo.search_root(position.board, player, root_moves, d, position, tt,
+                                             Algo.SearchDeadline(), stats, heuristics=heuristics)
+                root_moves = sorted(scored, key=lambda x: (-x[0], x[1]))
+                to_depth[d - 1] += time.perf_counter() - start
+                if root_moves[0][0] >= Algo.WIN_THRESHOLD:
+                    break
+            nodes += position.nodes
+            evaluations += stats.evaluations + stats.ordering_evaluations
+            best[name] = root_moves[0][::2]
+        results[label] = best
+        times = " ".join(f"d{d + 1} {t:6.2f}s" for d, t in enumerate(to_depth))
+        print(f"  {label:15s} {nodes:8d} nodes {evaluations:9d} evaluations   {times}")
+    same = results["evaluation"] == results["killer/history"]
+    print("  same moves and scores" if same else "  DIFFERENT RESULTS")
+
+def bench_linear_eval(depth=3):
+    #Linear pattern-feature evaluator vs the SCORES pattern evaluator:
+    #full-board evaluations per second and search speed with each table
+    import linear_eval
+    evaluator = linear_eval.LinearEvaluator.load()
+    positions = midgame_positions()
+    n = len(positions)
+    t_pattern = sum(time_call(lambda: Algo.evaluate_board(board, player), 20) for player, board in positions)
+    t_linear = sum(time_call(lambda: evaluator.evaluate(board, player), 20) for player, board in positions)
+    print("linear evaluator, full-board evaluations per second:")
+    print(f"  pattern evaluate_board {n / t_pattern:8.0f}   linear (NumPy features) {n / t_linear:8.0f}")
+    print(f"search at depth {depth} (incremental evaluation with each table):")
+    for name in Algo.EVALUATORS:
+        nodes = evaluations = 0
+        start = time.perf_counter()
+        for player, board in positions:
+            stats = Algo.SearchStats()
+            Algo.find_best_move(board, player, max_depth=depth, threat_search=False, use_book=False,
+                                stats=stats, evaluator=name)
+            nodes += stats.nodes
+            evaluations += stats.evaluations
+        elapsed = time.perf_counter() - start
+        print(f"  {name:8s} {elapsed:6.2f} s {nodes:7d} nodes {nodes / elapsed:7.0f} nodes/s "
+              f"{evaluations / elapsed:7.0f} evaluations/s")
+
+def centred(board, size):
+    #Copy of board in the middle of an empty size x size board
+    offset = (size - len(board)) // 2
+    big = logic.initialize_board(size)
+    for r, row in enumerate(board):
+        big[r + offset][offset:offset + len(row)] = row
+    return big
+
+def bench_board_sizes(sizes=(15, 19), depth=3):
+    #Same midgame positions centred on each board size: search cost should
+    #not grow with the board area, only full-board scans do
+    print(f"board sizes, midgame positions at depth {depth}:")
+    baseline = None
+    for size in sizes:
+        positions = [(player, centred(board, size)) for player, board in midgame_positions()]
+        offset = (size - Algo.BOARD_SIZE) // 2
+        t_eval = sum(time_call(lambda: Algo.evaluate_board(board, player), 10) for player, board in positions)
+        t_setup = sum(time_call(lambda: Algo.SearchBoard(board), 10) for player, board in positions)
+        nodes = 0
+        moves = []
+        start = time.perf_counter()
+        for player, board in positions:
+            stats = Algo.SearchStats()
+            r, c = Algo.find_best_move(board, player, max_depth=depth, threat_search=False, use_book=False,
+                                       stats=stats)
+            moves.append((r - offset, c - offset))
+            nodes += stats.nodes
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = moves
+        same = "same moves" if moves == baseline else "DIFFERENT MOVES"
+        print(f"  {size}x{size}: search {elapsed:6.2f} s {nodes:7d} nodes {nodes / elapsed:7.0f} nodes/s   "
+              f"evaluate_board {t_eval * 1e3:6.2f} ms   SearchBoard() {t_setup * 1e3:6.2f} ms   {same}")
+
+def bench_selective(depth=4, time_limit_ms=2000):
+    #Full-width vs selective move generation (find_best_move selective=...),
+    #without the threat pre-pass: nodes, time and solved positions on the
+    #tactical set, moves on the midgame positions, and the depth reached
+    #within a time budget
+    tactics = tactical_positions()
+    midgame = midgame_positions()
+    Algo.threat_module()  # Builds the threat tables outside the timings
+    print(f"selective move generation, widths {Algo.SELECTIVE_WIDTHS}:")
+    full_moves = None
+    for label, selective in (("full width", False), ("selective", True)):
+        nodes = solved = 0
+        missed = []
+        start = time.perf_counter()
+        for name, (player, board, answers) in tactics.items():
+            stats = Algo.SearchStats()
+            move = Algo.find_best_move([row[:] for row in board], player, max_depth=depth, threat_search=False,
+                                       use_book=False, stats=stats, selective=selective)
+            nodes += stats.nodes
+            if move in answers:
+                solved += 1
+            else:
+                missed.append(name)
+        elapsed = time.perf_counter() - start
+        moves = []
+        midgame_nodes = 0
+        for player, board in midgame:
+            stats = Algo.SearchStats()
+            moves.append(Algo.find_best_move(board, player, max_depth=depth, threat_search=False, use_book=False,
+                                             stats=stats, selective=selective))
+            midgame_nodes += stats.nodes
+        if full_moves is None:
+            full_moves = moves
+        same = sum(a == b for a, b in zip(moves, full_moves))
+        depths = []
+        for player, board in midgame:
+            stats = Algo.SearchStats()
+            Algo.find_best_move(board, player, max_depth=20, time_limit_ms=time_limit_ms, threat_search=False,
+                                use_book=False, stats=stats, selective=selective)
+            depths.append(stats.depth)
+        print(f"  {label:10s} tactical d{depth}: {nodes:7d} nodes {elapsed:6.2f} s solved {solved}/{len(tactics)}"
+              f"{' missed ' + ','.join(missed) if missed else ''}")
+        print(f"  {'':10s} midgame d{depth}:  {midgame_nodes:7d} nodes, same move as full width {same}/{len(moves)}"
+              f"   depth in {time_limit_ms} ms {depths}")
+
+# --- GUI benchmarks (need a display) ---
+
+def full_redraw(ui):
+    #Reference: the old draw_board, deleting and re-creating every item
+    canvas = ui.canvas
+    canvas.delete("all")
+    end = ui.MARGIN + (ui.BOARD_SIZE - 1) * ui.CELL_SIZE
+    for i in range(ui.BOARD_SIZE):
+        offset = ui.MARGIN + i * ui.CELL_SIZE
+        canvas.create_line(ui.MARGIN, offset, end, offset)
+        canvas.create_line(offset, ui.MARGIN, offset, end)
+    r_offset = ui.CELL_SIZE * 0.4
+    for r in range(ui.BOARD_SIZE):
+        for c in range(ui.BOARD_SIZE):
+            if ui.board[r][c] != ui.Empty:
+                x = ui.MARGIN + c * ui.CELL_SIZE
+                y = ui.MARGIN + r * ui.CELL_SIZE
+                canvas.create_oval(x - r_offset, y - r_offset, x + r_offset, y + r_offset,
+                                   fill="black" if ui.board[r][c] == ui.Black else "white",
+                                   outline="gray" if ui.board[r][c] == ui.White else "black")
+
+def bench_rendering(size=Algo.BOARD_SIZE, late=50, seed=0):
+    #Frame time (draw plus Tk idle redraw) while a game fills the whole
+    #board, old full redraw vs incremental draw_board
+    import tkinter as tk
+    import interaction as ui
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"rendering: no display ({e})")
+        return
+    ui.set_board_size(size)
+    ui.canvas = tk.Canvas(root, width=ui.WINDOW_SIZE, height=ui.WINDOW_SIZE)
+    ui.canvas.pack()
+    cells = [(r, c) for r in range(size) for c in range(size)]
+    random.Random(seed).shuffle(cells)
+
+    print(f"rendering, {size}x{size} board filled move by move (ms per frame):")
+    for name, draw in (("full redraw", lambda: full_redraw(ui)), ("incremental", ui.draw_board)):
+        ui.board = logic.initialize_board(size)
+        ui.canvas.delete("all")
+        ui.stone_items.clear()
+        draw()
+        root.update()
+        frames = []
+        for i, (r, c) in enumerate(cells):
+            ui.board[r][c] = Algo.Black if i % 2 == 0 else Algo.White
+            start = time.perf_counter()
+            draw()
+            root.update_idletasks()
+            frames.append(time.perf_counter() - start)
+        ui.board = logic.initialize_board(size)
+        start = time.perf_counter()
+        if draw is ui.draw_board:
+            ui.clear_stones()
+        else:
+            draw()
+        root.update_idletasks()
+        restart = time.perf_counter() - start
+        tail = frames[-late:]
+        print(f"  {name:12s} mean {sum(frames) / len(frames) * 1e3:6.2f}   last {late}: mean "
+              f"{sum(tail) / len(tail) * 1e3:6.2f} max {max(tail) * 1e3:6.2f}   restart {restart * 1e3:6.2f}")
+    root.destroy()
+
+def bench_startup(runs=3):
+    #interaction.py --startup-time (import to first paint and to the
+    #background) with the background cache missing and present, and the
+    #PIL import, open and resize that used to run before the window showed
+    import subprocess
+    import interaction as ui
+    here = os.path.dirname(os.path.abspath(__file__))
+    script = os.path.join(here, "interaction.py")
+    cache = os.path.join(here, ".background_cache")
+    print("startup:")
+    for label, cold in (("cache missing", True), ("cache present", False)):
+        for _ in range(runs):
+            if cold and os.path.isdir(cache):
+                for name in os.listdir(cache):
+                    os.remove(os.path.join(cache, name))
+            result = subprocess.run([sys.executable, script, "--startup-time"], capture_output=True, text=True)
+            lines = (result.stdout or result.stderr).strip().splitlines()
+            print(f"  {label}: {lines[-1] if lines else 'no output'}")
+    old = ("import time; t = time.perf_counter(); from PIL import Image; "
+           f"img = Image.open({os.path.join(here, 'mmexport1765254795139_edit_70690453677752.jpg')!r}); "
+           f"img.resize(({ui.WINDOW_SIZE}, {ui.WINDOW_SIZE}), Image.LANCZOS); "
+           "print(f'{(time.perf_counter() - t) * 1000:.0f} ms')")
+    result = subprocess.run([sys.executable, "-c", old], capture_output=True, text=True)
+    print(f"  old path before the window, PIL import + open + resize: {result.stdout.strip()}")
+
+# --- Engine benchmark suite ---
+
+def board_from_moves(moves):
+    #Board after alternating moves (black first); returns (side to move, board)
+    board = [[Algo.Empty] * Algo.BOARD_SIZE for _ in range(Algo.BOARD_SIZE)]
+    for i, (r, c) in enumerate(moves):
+        board[r][c] = Algo.Black if i % 2 == 0 else Algo.White
+    return (Algo.Black if len(moves) % 2 == 0 else Algo.White), board
+
+def near_full_position(empty_cells, seed):
+    #Board filled in random order without any five, leaving empty_cells empty
+    rng = random.Random(seed)
+    board = [[Algo.Empty] * Algo.BOARD_SIZE for _ in range(Algo.BOARD_SIZE)]
+    cells = [(r, c) for r in range(Algo.BOARD_SIZE) for c in range(Algo.BOARD_SIZE)]
+    rng.shuffle(cells)
+    placed = 0
+    for r, c in cells:
+        if placed == len(cells) - empty_cells:
+            break
+        colours = [Algo.Black, Algo.White] if placed % 2 == 0 else [Algo.White, Algo.Black]
+        for colour in colours:
+            if not logic.check_win(board, r, c, colour):
+                board[r][c] = colour
+                placed += 1
+                break
+    return (Algo.Black if placed % 2 == 0 else Algo.White), board
+
+def benchmark_corpus():
+    #Fixed positions: {name: (side to move, board)}
+    corpus = {
+        "opening-0": board_from_moves([(7, 7), (6, 8), (8, 8)]),
+        "opening-1": board_from_moves([(7, 7), (8, 8), (7, 8), (6, 6)]),
+        "opening-2": board_from_moves([(7, 7), (7, 8), (6, 7), (8, 6), (5, 9), (8, 8)]),
+        # Black to move: open three on row 7, white threatens on column 9
+        "tactical-0": board_from_moves([(7, 5), (5, 9), (7, 6), (6, 9), (7, 7), (8, 9), (2, 2), (9, 10)]),
+        # Black to move and must block white's four on the diagonal at (8, 8)
+        "tactical-1": board_from_moves([(3, 3), (4, 4), (7, 8), (5, 5), (8, 9), (6, 6), (9, 10), (7, 7)]),
+        # White to move with an open three on row 6
+        "tactical-2": board_from_moves([(7, 7), (6, 6), (8, 8), (6, 8), (9, 6), (6, 7), (5, 9)]),
+    }
+    for i, (player, board) in enumerate(midgame_positions()):
+        corpus[f"midgame-{i}"] = (player, board)
+    for i, empty in enumerate((24, 12)):
+        corpus[f"near-full-{i}"] = near_full_position(empty, 100 + i)
+    return corpus
+
+def board_from_stones(black, white):
+    #Board with the given stones; returns (side to move, board)
+    board = [[Algo.Empty] * Algo.BOARD_SIZE for _ in range(Algo.BOARD_SIZE)]
+    for r, c in black:
+        board[r][c] = Algo.Black
+    for r, c in white:
+        board[r][c] = Algo.White
+    return (Algo.Black if len(black) == len(white) else Algo.White), board
+
+def tactical_positions():
+    #Positions with known answers: {name: (side to move, board, moves that solve it)}
+    corpus = benchmark_corpus()
+    positions = {
+        "tactical-0": corpus["tactical-0"] + ({(7, 4), (7, 8)},),
+        "tactical-1": corpus["tactical-1"] + ({(8, 8)},),
+        "tactical-2": corpus["tactical-2"] + ({(6, 5), (6, 9)},),
+    }
+    cases = {
+        # Black completes five on row 7
+        "five": ([(7, 5), (7, 6), (7, 7), (7, 8)], [(7, 4), (6, 6), (8, 9), (5, 10)], {(7, 9)}),
+        # Black blocks white's four on the diagonal
+        "block-four": ([(4, 4), (7, 6), (6, 8), (9, 5)], [(5, 5), (6, 6), (7, 7), (8, 8)], {(9, 9)}),
+        # Black blocks white's open three on row 6 next to it
+        "block-three": ([(7, 6), (5, 8), (9, 9)], [(6, 5), (6, 6), (6, 7)], {(6, 4), (6, 8)}),
+        # Black turns its open three into a live four
+        "live-four": ([(8, 6), (8, 7), (8, 8)], [(6, 6), (10, 9), (5, 10)], {(8, 5), (8, 9)}),
+        # Black makes a four on row 7 and an open three on column 7
+        "four-three": ([(7, 4), (7, 5), (7, 6), (5, 7), (6, 7)], [(7, 3), (10, 10), (11, 2), (2, 11), (12, 12)],
+                       {(7, 7)}),
+        # Black makes two fours at once from two closed threes
+        "double-four": ([(7, 4), (7, 5), (7, 6), (4, 8), (5, 8), (6, 8)],
+                        [(7, 3), (3, 8), (10, 10), (11, 2), (2, 11), (12, 12)], {(7, 8)}),
+    }
+    for name, (black, white, answers) in cases.items():
+        positions[name] = board_from_stones(black, white) + (answers,)
+    return positions
+
+def run_suite(depths=(1, 2, 3, 4), names=None, log=print):
+    #Time the engine on the corpus; returns a JSON-serialisable dict
+    results = {}
+    for name, (player, board) in benchmark_corpus().items():
+        if names and name not in names:
+            continue
+        entry = {}
+        stones = [(r, c, board[r][c]) for r in range(Algo.BOARD_SIZE) for c in range(Algo.BOARD_SIZE)
+                  if board[r][c] != Algo.Empty]
+
+        entry["evaluate_board"] = {"seconds": time_call(lambda: Algo.evaluate_board(board, player), 5)}
+        entry["generate_candidate_moves"] = {
+            "seconds": time_call(lambda: Algo.generate_candidate_moves(board), 5)}
+
+        def all_check_win():
+            for r, c, p in stones:
+                logic.check_win(board, r, c, p)
+
+        entry["check_win"] = {"seconds": time_call(all_check_win, 5) / max(len(stones), 1)}
+
+        for depth in depths:
+            stats = Algo.SearchStats()
+            move = Algo.find_best_move([row[:] for row in board], player, max_depth=depth,
+                                       use_book=False, threat_search=False, stats=stats)
+            entry[f"find_best_move/d{depth}"] = {
+                "seconds": stats.elapsed,
+                "nodes": stats.nodes,
+                "nps": stats.nodes_per_second(),
+                "move": list(move) if move is not None else None,
+                "score": stats.score,
+            }
+            log(f"  {name:12s} depth {depth}: {stats.elapsed:8.3f} s {stats.nodes:8d} nodes "
+                f"{stats.nodes_per_second():9.0f} nodes/s  move {move}")
+        results[name] = entry
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "depths": list(depths),
+        },
+        "results": results,
+    }
+
+def compare_results(baseline, current, threshold=0.10, min_seconds=1e-3):
+    #Regressions (slower by more than threshold) and behaviour changes
+    #Returns (regressions, changes) as lists of text lines
+    regressions = []
+    changes = []
+    for name, metrics in sorted(current["results"].items()):
+        base_metrics = baseline["results"].get(name)
+        if base_metrics is None:
+            continue
+        for metric, value in sorted(metrics.items()):
+            base = base_metrics.get(metric)
+            if base is None:
+                continue
+            label = f"{name} {metric}"
+            ratio = value["seconds"] / base["seconds"] if base["seconds"] > 0 else 1.0
+            slower = value["seconds"] - base["seconds"]
+            if ratio > 1 + threshold and (slower > min_seconds or not metric.startswith("find_best_move")):
+                regressions.append(f"{label}: {base['seconds']:.6f} s -> {value['seconds']:.6f} s (x{ratio:.2f})")
+            if base.get("move") != value.get("move"):
+                changes.append(f"{label}: move {base.get('move')} -> {value.get('move')}")
+            if "nodes" in base and base["nodes"] != value.get("nodes"):
+                changes.append(f"{label}: nodes {base['nodes']} -> {value.get('nodes')}")
+    return regressions, changes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gomoku engine benchmarks")
+    sub = parser.add_subparsers(dest="command")
+    gui_parser = sub.add_parser("gui", help="GUI rendering and startup benchmarks (needs a display)")
+    gui_parser.add_argument("--size", type=int, default=Algo.BOARD_SIZE)
+    suite_parser = sub.add_parser("suite", help="run the benchmark suite")
+    suite_parser.add_argument("--depths", default="1,2,3,4", help="comma-separated search depths")
+    suite_parser.add_argument("--positions", default="", help="comma-separated corpus names (default: all)")
+    suite_parser.add_argument("--out", help="write results to this JSON file")
+    compare_parser = sub.add_parser("compare", help="compare results against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current", nargs="?", help="results file (default: run the suite now)")
+    compare_parser.add_argument("--depths", default="1,2,3,4")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        bench_pattern_scoring()
+        bench_bitboard()
+        bench_move_ordering()
+        bench_search_nodes()
+        bench_threat_search()
+        bench_parallel()
+        bench_move_heuristics()
+        bench_board_sizes()
+        bench_linear_eval()
+        bench_selective()
+        return 0
+    if args.command == "gui":
+        bench_rendering(args.size)
+        bench_startup()
+        return 0
+
+    depths = [int(d) for d in args.depths.split(",")]
+    if args.command == "suite":
+        results = run_suite(depths, [n for n in args.positions.split(",") if n])
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(results, f, indent=1)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        current = run_suite(depths, list(baseline["results"]))
+    regressions, changes = compare_results(baseline, current, args.threshold)
+    for line in changes:
+        print(f"CHANGED    {line}")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regressions, {len(changes)} behaviour changes")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
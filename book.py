@@ -0,0 +1,178 @@
+import os
+import sys
+import mmap
+import struct
+import argparse
+import time
+import Algorithm as Algo
+
+# Opening book: engine moves for early positions, keyed by the Zobrist key
+# of the position reduced over the 8 board symmetries.
+#
+# File layout (little endian):
+#   header  b"GMKBOOK1", uint32 board size, uint32 record count
+#   records sorted by key: uint64 canonical key, uint8 row, uint8 col
+# The move is stored in the orientation that gave the smallest key.
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+BOOK_MAX_STONES = 6
+
+MAGIC = b"GMKBOOK1"
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<QBB")
+
+N = Algo.BOARD_SIZE
+
+# The 8 symmetries of the square board and their inverses
+SYMMETRIES = [
+    lambda r, c: (r, c),
+    lambda r, c: (c, N - 1 - r),          # rotate 90
+    lambda r, c: (N - 1 - r, N - 1 - c),  # rotate 180
+    lambda r, c: (N - 1 - c, r),          # rotate 270
+    lambda r, c: (r, N - 1 - c),          # mirror left-right
+    lambda r, c: (c, r),                  # transpose
+    lambda r, c: (N - 1 - r, c),          # mirror top-bottom
+    lambda r, c: (N - 1 - c, N - 1 - r),  # anti-transpose
+]
+INVERSE = [0, 3, 2, 1, 4, 5, 6, 7]
+
+def canonical_key(board, player):
+    #(smallest key over the symmetries, symmetry that gives it)
+    stones = [(r, c, board[r][c]) for r in range(N) for c in range(N) if board[r][c] != Algo.Empty]
+    side = Algo.ZOBRIST_WHITE_TO_MOVE if player == Algo.White else 0
+    best = None
+    for s, transform in enumerate(SYMMETRIES):
+        key = side
+        for r, c, p in stones:
+            tr, tc = transform(r, c)
+            key ^= Algo.ZOBRIST_KEYS[tr][tc][p]
+        if best is None or key < best[0]:
+            best = (key, s)
+    return best
+
+class OpeningBook:
+    #Read-only book backed by a memory-mapped file
+
+    def __init__(self, path=BOOK_PATH):
+        self.file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise
+        magic, size, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or size != N:
+            self.close()
+            raise ValueError(f"{path}: not an opening book for a {N}x{N} board")
+
+    def _find(self, key):
+        #Binary search for key; stored move or None
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key, r, c = RECORD.unpack_from(self.data, HEADER.size + mid * RECORD.size)
+            if mid_key == key:
+                return r, c
+            if mid_key < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def lookup(self, board, player):
+        #Book move for player in this board orientation, or None
+        key, s = canonical_key(board, player)
+        move = self._find(key)
+        if move is None:
+            return None
+        r, c = SYMMETRIES[INVERSE[s]](*move)
+        if board[r][c] != Algo.Empty:
+            return None
+        return r, c
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+_default_book = None
+
+def default_book():
+    #Book at BOOK_PATH, opened once; False if there is none
+    global _default_book
+    if _default_book is None:
+        try:
+            _default_book = OpeningBook()
+        except (OSError, ValueError):
+            _default_book = False
+    return _default_book
+
+def book_move(board, player):
+    #Move from the default book, or None (also for other board sizes)
+    if len(board) != N or sum(cell != Algo.Empty for row in board for cell in row) > BOOK_MAX_STONES:
+        return None
+    book = default_book()
+    return book.lookup(board, player) if book else None
+
+# --- Offline book building ---
+
+def write_book(entries, path):
+    #entries: {canonical key: (row, col)}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, N, len(entries)))
+        for key in sorted(entries):
+            r, c = entries[key]
+            f.write(RECORD.pack(key, r, c))
+    os.replace(tmp_path, path)
+
+def build_book(plies, depth, reply_radius=1, workers=1, log=print):
+    #Search every position up to `plies` stones reached by engine moves and
+    #by replies within reply_radius of the last stone, merged by symmetry
+    entries = {}
+    frontier = [([[Algo.Empty] * N for _ in range(N)], Algo.Black, None)]
+    for ply in range(plies):
+        next_frontier = []
+        seen = set()
+        start = time.time()
+        for board, player, last in frontier:
+            key, s = canonical_key(board, player)
+            if key in entries:
+                continue
+            move = Algo.find_best_move(board, player, max_depth=depth, workers=workers, use_book=False)
+            entries[key] = SYMMETRIES[s](*move)
+
+            # Children: the engine move and the nearby replies to the last stone
+            replies = [move]
+            if last is not None:
+                for dr in range(-reply_radius, reply_radius + 1):
+                    for dc in range(-reply_radius, reply_radius + 1):
+                        r, c = last[0] + dr, last[1] + dc
+                        if 0 <= r < N and 0 <= c < N and board[r][c] == Algo.Empty and (r, c) not in replies:
+                            replies.append((r, c))
+            opponent = Algo.White if player == Algo.Black else Algo.Black
+            for r, c in replies:
+                child = [row[:] for row in board]
+                child[r][c] = player
+                child_key = canonical_key(child, opponent)[0]
+                if child_key not in seen:
+                    seen.add(child_key)
+                    next_frontier.append((child, opponent, (r, c)))
+        log(f"ply {ply}: {len(frontier)} positions, {len(entries)} book entries, {time.time() - start:.1f} s")
+        frontier = next_frontier
+    return entries
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the opening book by running the engine offline")
+    parser.add_argument("--plies", type=int, default=4, help="stones on the deepest book positions")
+    parser.add_argument("--depth", type=int, default=4, help="search depth for book moves")
+    parser.add_argument("--radius", type=int, default=1, help="replies considered around the last stone")
+    parser.add_argument("--workers", type=int, default=1, help="processes for root-parallel search")
+    parser.add_argument("--out", default=BOOK_PATH)
+    args = parser.parse_args(argv)
+
+    entries = build_book(args.plies, args.depth, args.radius, args.workers)
+    write_book(entries, args.out)
+    print(f"wrote {len(entries)} positions to {args.out}")
+
+if __name__ == "__main__":
+    sys.exit(main())
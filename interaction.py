@@ -1,12 +1,16 @@
+import time
+STARTED = time.perf_counter()  # startup time is measured from here
 import tkinter as tk
 import Algorithm as Algo
 import logic 
 from tkinter import messagebox
+import os
+import queue
+import sys
 import threading
-from PIL import Image, ImageTk
 
-# Constants
-BOARD_SIZE = 15
+# Constants (board size: python interaction.py [size])
+BOARD_SIZE = logic.BOARD_SIZE
 Empty = 0
 Black = 1
 White = 2
@@ -16,6 +20,24 @@ CELL_SIZE = 40
 MARGIN = 30
 WINDOW_SIZE = MARGIN * 2 + CELL_SIZE * (BOARD_SIZE - 1)
 
+# AI search settings (iterative deepening up to AI_MAX_DEPTH within the budget)
+AI_MAX_DEPTH = 3
+AI_TIME_LIMIT_MS = 5000
+# Processes for root-parallel search (1 = search in the AI thread)
+AI_WORKERS = 1
+# How often the GUI checks the engine for results
+ENGINE_POLL_MS = 50
+# Pondering: while the player thinks, search answers to this many of the
+# player's likely moves (0 turns pondering off)
+AI_PONDER_REPLIES = 3
+
+# Background image. It is shown from a copy resized to the window, cached
+# as a PPM that tkinter loads without PIL; the file name holds the source
+# mtime and the size, so a changed image or window rebuilds it
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKGROUND_IMAGE = os.path.join(HERE, 'mmexport1765254795139_edit_70690453677752.jpg')
+BACKGROUND_CACHE_DIR = os.path.join(HERE, '.background_cache')
+
 # Global variables
 root = None
 canvas = None
@@ -27,61 +49,165 @@ warning = 0
 move = 0
 game_started = False
 pending_after_id = None
-ai_search_id = 0
-ai_working = False
-ai_stop_event = None
 bg_photo = None
+# Stones on the canvas: (r, c) -> (canvas item id, colour). draw_board only
+# touches the cells whose stone differs from the board
+stone_items = {}
+# Seconds from STARTED to the first paint and to the background being
+# shown; printed when started with --startup-time
+startup_times = {}
+startup_report = False
+# Persistent AI engine (Algo.Engine) and the id of the search the GUI is
+# waiting for (None when the AI is not on move)
+engine = None
+ai_request = None
 
 # Initialize board
 board = [[Empty for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
 
-def draw_board():
-    #Draw grid and pieces based on board state
-    global canvas, board
-    
+def set_board_size(size):
+    #Play on a size x size board (before start_gui)
+    global BOARD_SIZE, WINDOW_SIZE, board
+    BOARD_SIZE = size
+    WINDOW_SIZE = MARGIN * 2 + CELL_SIZE * (BOARD_SIZE - 1)
+    board = logic.initialize_board(BOARD_SIZE)
+
+def draw_static():
+    #Draw the background and grid once; they stay below the stones
+    global canvas
+
     canvas.delete("all")
-    
+    stone_items.clear()
+
     # Draw background image if available
     try:
-        global bg_photo
         if bg_photo is not None:
-            canvas.create_image(0, 0, image=bg_photo, anchor=tk.NW)
+            canvas.create_image(0, 0, image=bg_photo, anchor=tk.NW, tags="static")
     except Exception:
         pass
-    
+
     # Draw grid lines
+    end = MARGIN + (BOARD_SIZE - 1) * CELL_SIZE
     for i in range(BOARD_SIZE):
-        # Horizontal lines
-        start_x = MARGIN
-        start_y = MARGIN + i * CELL_SIZE
-        end_x = MARGIN + (BOARD_SIZE - 1) * CELL_SIZE
-        end_y = start_y
-        canvas.create_line(start_x, start_y, end_x, end_y)
-        
-        # Vertical lines
-        start_x = MARGIN + i * CELL_SIZE
-        start_y = MARGIN
-        end_x = start_x
-        end_y = MARGIN + (BOARD_SIZE - 1) * CELL_SIZE
-        canvas.create_line(start_x, start_y, end_x, end_y)
-
-    # Draw pieces
+        offset = MARGIN + i * CELL_SIZE
+        canvas.create_line(MARGIN, offset, end, offset, tags="static")  # Horizontal
+        canvas.create_line(offset, MARGIN, offset, end, tags="static")  # Vertical
+
+def background_cache_path(size):
+    mtime = os.stat(BACKGROUND_IMAGE).st_mtime_ns
+    return os.path.join(BACKGROUND_CACHE_DIR, f"background_{size}x{size}_{mtime}.ppm")
+
+def build_background_cache(path, size):
+    #Resize the background with PIL and save it as path, replacing older
+    #copies of the same size. Only this needs PIL
+    from PIL import Image
+    os.makedirs(BACKGROUND_CACHE_DIR, exist_ok=True)
+    prefix = f"background_{size}x{size}_"
+    for name in os.listdir(BACKGROUND_CACHE_DIR):
+        if name.startswith(prefix):
+            os.remove(os.path.join(BACKGROUND_CACHE_DIR, name))
+    img = Image.open(BACKGROUND_IMAGE).convert("RGB")
+    img = img.resize((size, size), Image.LANCZOS)
+    img.save(path + ".tmp", "PPM")
+    os.replace(path + ".tmp", path)
+    return path
+
+def on_first_expose(event):
+    #The canvas is painted at idle time after its first Expose; the
+    #background is loaded after that
+    canvas.unbind("<Expose>")
+    root.after_idle(load_background)
+
+def load_background():
+    #Show the background once the window is up. A missing cache is built
+    #in a thread, the board can be used meanwhile
+    startup_times["first_paint"] = time.perf_counter() - STARTED
+    try:
+        path = background_cache_path(WINDOW_SIZE)
+    except OSError:
+        show_background(None)
+        return
+    if os.path.exists(path):
+        show_background(path)
+        return
+
+    built = []
+
+    def build():
+        try:
+            built.append(build_background_cache(path, WINDOW_SIZE))
+        except Exception:
+            built.append(None)
+
+    def wait_for_build():
+        if root is None:
+            return
+        if built:
+            show_background(built[0])
+        else:
+            root.after(ENGINE_POLL_MS, wait_for_build)
+
+    threading.Thread(target=build, daemon=True).start()
+    wait_for_build()
+
+def show_background(path):
+    #Put the cached background (None: no background) below the grid
+    global bg_photo
+
+    if path is not None:
+        try:
+            bg_photo = tk.PhotoImage(file=path)
+            canvas.bg_photo = bg_photo
+            item = canvas.create_image(0, 0, image=bg_photo, anchor=tk.NW, tags="static")
+            canvas.tag_lower(item)
+        except tk.TclError:
+            bg_photo = None
+    startup_times["background"] = time.perf_counter() - STARTED
+    if startup_report:
+        print(f"startup: first paint {startup_times['first_paint'] * 1000:.0f} ms, "
+              f"background {startup_times['background'] * 1000:.0f} ms")
+        engine.close()
+        root.destroy()
+
+def draw_stone(r, c, player):
+    #Create the oval of one stone and remember its item id
     r_offset = CELL_SIZE * 0.4
-    
+    center_x = MARGIN + c * CELL_SIZE
+    center_y = MARGIN + r * CELL_SIZE
+    color = "black" if player == Black else "white"
+    outline_color = "gray" if player == White else "black"
+    item = canvas.create_oval(
+        center_x - r_offset, center_y - r_offset,
+        center_x + r_offset, center_y + r_offset,
+        fill=color, outline=outline_color, tags="stone"
+    )
+    stone_items[(r, c)] = (item, player)
+
+def clear_stones():
+    #Remove every stone, keeping the background and grid
+    canvas.delete("stone")
+    stone_items.clear()
+
+def draw_board():
+    #Bring the stones on the canvas in line with the board state
+    #Only stones that were added, removed or changed colour are redrawn
+    global canvas, board
+
+    if not canvas.find_withtag("static"):
+        draw_static()
+
     for r in range(BOARD_SIZE):
+        row = board[r]
         for c in range(BOARD_SIZE):
-            if board[r][c] != Empty:
-                center_x = MARGIN + c * CELL_SIZE
-                center_y = MARGIN + r * CELL_SIZE
-                
-                color = "black" if board[r][c] == Black else "white"
-                outline_color = "gray" if board[r][c] == White else "black"
-                
-                canvas.create_oval(
-                    center_x - r_offset, center_y - r_offset,
-                    center_x + r_offset, center_y + r_offset,
-                    fill=color, outline=outline_color
-                )
+            player = row[c]
+            drawn = stone_items.get((r, c))
+            if drawn is not None and drawn[1] == player:
+                continue
+            if drawn is not None:
+                canvas.delete(drawn[0])
+                del stone_items[(r, c)]
+            if player != Empty:
+                draw_stone(r, c, player)
 
 def handle_click(event):
     #Handle mouse click to place player piece
@@ -101,6 +227,7 @@ def handle_click(event):
         warning = 0
         move = 1
         board[r][c] = player_color
+        engine.play(r, c, player_color)
         draw_board()
         
         # Check win
@@ -142,91 +269,96 @@ def choose_color():
 
 def AI_move():
     
-    #Start AI search in background thread
-    #Uses ai_search_id to invalidate old searches
+    #Ask the engine for the AI move
+    #The answer arrives through poll_engine
     
-    global board, current_player, ai_color, player_color, state, move, pending_after_id, game_started, ai_search_id, ai_working, ai_stop_event
+    global state, pending_after_id, ai_request
 
-    if not game_started:
-        pending_after_id = None
+    pending_after_id = None
+    if not game_started or ai_request is not None:
         return
 
-    if ai_working:
-        return
-
-    ai_working = True
-    ai_search_id += 1
-    this_search_id = ai_search_id
-
-    ai_stop_event = threading.Event()
-    stop_ev = ai_stop_event
-
-    # Update status
     state.config(text="AI is making its move...")
-    root.update()
+    ai_request = engine.search(ai_color)
 
-    # Take snapshot of board for thread safety
-    board_snapshot = [row[:] for row in board]
+def poll_engine():
+    #Handle engine responses (main thread), then poll again
+    global ai_request
 
-    def worker(board_snap, search_id, stop_ev):
-        #Background thread for AI calculation.
+    if root is None:
+        return
+    progress = None
+    while True:
         try:
-            position = Algo.find_best_move(board_snap, ai_color, max_depth=3, stop_event=stop_ev)
-        except Exception as e:
-            position = None
-            print("AI worker error:", e)
-
-        def finish():
-            #Return to main thread to update UI
-            global board, current_player, move, state, ai_working, game_started
-            # Ignore if search was invalidated
-            if search_id != ai_search_id or not game_started or (stop_ev is not None and stop_ev.is_set()):
-                ai_working = False
-                return
-
-            # Handle no valid moves
-            if position is None:
-                if logic.is_board_full(board):
-                    messagebox.showinfo("Game Over", "Game ends in a draw!")
-                    game_started = False
-                    ai_working = False
-                    return
-                else:
-                    messagebox.showinfo("Game Over", "No valid moves available!")
-                    board = logic.initialize_board()
-                    draw_board()
-                    ai_working = False
-                    return
-
-            # Place AI move
-            board[position[0]][position[1]] = ai_color
+            search_id, kind, payload = engine.responses.get_nowait()
+        except queue.Empty:
+            break
+        # Ignore results of cancelled or superseded searches
+        if search_id != ai_request:
+            continue
+        if kind == "progress":
+            progress = payload
+        elif kind == "move":
+            ai_request = None
+            progress = None
+            if game_started:
+                apply_ai_move(payload[0])
+        elif kind == "error":
+            ai_request = None
+            print("AI worker error:", payload)
+
+    if progress is not None:
+        state.config(text=f"AI is thinking... depth {progress['depth']}, "
+                          f"best {progress['move']}, {progress['nodes']} nodes")
+    root.after(ENGINE_POLL_MS, poll_engine)
+
+def apply_ai_move(position):
+    #Play the AI's move on the board (main thread)
+    global board, current_player, move, state, game_started
+
+    # Handle no valid moves
+    if position is None:
+        if logic.is_board_full(board):
+            messagebox.showinfo("Game Over", "Game ends in a draw!")
+            game_started = False
+            return
+        else:
+            messagebox.showinfo("Game Over", "No valid moves available!")
+            board = logic.initialize_board(BOARD_SIZE)
+            engine.new_game()
             draw_board()
+            return
 
-            # Check AI win
-            if logic.check_win(board, position[0], position[1], ai_color):
-                messagebox.showinfo("Game Over", "AI wins!")
-                game_started = False
-                ai_working = False
-                return
+    # Place AI move
+    board[position[0]][position[1]] = ai_color
+    engine.play(position[0], position[1], ai_color)
+    draw_board()
 
-            # Check draw
-            if logic.is_board_full(board):
-                messagebox.showinfo("Game Over", "Game ends in a draw!")
-                game_started = False
-                ai_working = False
-                return
+    # Check AI win
+    if logic.check_win(board, position[0], position[1], ai_color):
+        messagebox.showinfo("Game Over", "AI wins!")
+        game_started = False
+        return
 
-            # Switch back to player
-            current_player = player_color
-            move = 0
-            state.config(text="Your turn")
-            ai_working = False
+    # Check draw
+    if logic.is_board_full(board):
+        messagebox.showinfo("Game Over", "Game ends in a draw!")
+        game_started = False
+        return
 
-        root.after(0, finish)
+    # Switch back to player; the engine ponders on the player's time
+    current_player = player_color
+    move = 0
+    state.config(text="Your turn" + ponder_summary())
+    engine.ponder(ai_color)
 
-    # Start background thread
-    t = threading.Thread(target=worker, args=(board_snapshot, this_search_id, stop_ev), daemon=True)
-    t.start()
+def ponder_summary():
+    #Ponder hit rate and time saved, for the status label
+    stats = engine.ponder_stats
+    total = stats["hits"] + stats["misses"]
+    if total == 0:
+        return ""
+    return f" (ponder hits {stats['hits']}/{total}, {stats['saved']:.1f} s saved)"
 
 def start_game_turn():
     #Start the game with appropriate first player
@@ -234,7 +366,8 @@ def start_game_turn():
     
     game_started = True
     move = 0
-    board = logic.initialize_board()
+    board = logic.initialize_board(BOARD_SIZE)
+    engine.new_game()
     draw_board()
     
     if ai_color == Black:  # AI goes first
@@ -253,12 +386,13 @@ def on_player_move():
     
     current_player = ai_color
     move = 0
-    state.config(text="AI is thinking...")
-    pending_after_id = root.after(800, AI_move)
+    # The engine answers pondered positions at once and searches the rest
+    # in its worker, so there is no need to wait before asking
+    AI_move()
 
 def reconfirm():
     #Confirm and handle window closing
-    global pending_after_id, game_started, root, ai_stop_event
+    global pending_after_id, game_started, root, ai_request
     
     try:
         ok = messagebox.askokcancel("Quit", "Do you really want to quit?")
@@ -274,10 +408,10 @@ def reconfirm():
             pass
         pending_after_id = None
         
-        # Stop any running AI search
+        # Stop the AI engine and its worker
+        ai_request = None
         try:
-            if ai_stop_event is not None:
-                ai_stop_event.set()
+            engine.close()
         except Exception:
             pass
         
@@ -293,7 +427,7 @@ def reconfirm():
 
 def restart():
     #Restart the game with confirmation
-    global game_started, board, current_player, player_color, ai_color, state, move, ai_stop_event, pending_after_id
+    global game_started, board, current_player, player_color, ai_color, state, move, ai_request, pending_after_id
     
     if messagebox.askyesno("Restart", "Do you want to restart the game?"):
         # Cancel pending callbacks
@@ -304,27 +438,23 @@ def restart():
             pass
         pending_after_id = None
 
-        # Stop AI search
-        try:
-            if ai_stop_event is not None:
-                ai_stop_event.set()
-                ai_stop_event = None
-        except Exception:
-            pass
+        # Stop AI search; its result will be ignored
+        ai_request = None
+        engine.new_game()
 
         # Reset game state
-        board = logic.initialize_board()
+        board = logic.initialize_board(BOARD_SIZE)
         current_player = Black
         game_started = False
         player_color = None
         ai_color = None
         move = 0
-        draw_board()
+        clear_stones()
         state.config(text="Welcome to play gomoku!")
 
 def start_gui():
     #Initialize and start the GUI.
-    global root, canvas, state, board, current_player, game_started, bg_photo
+    global root, canvas, state, board, current_player, game_started, bg_photo, engine
     
     root = tk.Tk()
     root.title("Gomoku")
@@ -337,7 +467,7 @@ def start_gui():
     root.geometry(f"{WINDOW_SIZE}x{WINDOW_SIZE + 80}+{x}+{y}")
     
     # Reset game state
-    board = logic.initialize_board()
+    board = logic.initialize_board(BOARD_SIZE)
     current_player = Black
     game_started = False
     
@@ -361,22 +491,26 @@ def start_gui():
     canvas.pack()
     canvas.focus_set()
     
-    # Try to load background image
-    try:
-        img = Image.open('mmexport1765254795139_edit_70690453677752.jpg')
-        img = img.resize((WINDOW_SIZE, WINDOW_SIZE), Image.LANCZOS)
-        bg_photo = ImageTk.PhotoImage(img)
-        canvas.bg_photo = bg_photo
-    except Exception:
-        bg_photo = None
-
+    # The background is loaded after the first paint (load_background)
+    bg_photo = None
     draw_board()
     
     root.resizable(False, False)
     root.protocol("WM_DELETE_WINDOW", reconfirm)
     canvas.bind("<Button-1>", handle_click)
+    engine = Algo.Engine(max_depth=AI_MAX_DEPTH, time_limit_ms=AI_TIME_LIMIT_MS, workers=AI_WORKERS,
+                         ponder_replies=AI_PONDER_REPLIES, size=BOARD_SIZE)
+    root.after(ENGINE_POLL_MS, poll_engine)
+    canvas.bind("<Expose>", on_first_expose)
     root.mainloop()
 
 # Entry point
+# (python interaction.py [size] [--startup-time])
 if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--startup-time" in args:
+        args.remove("--startup-time")
+        startup_report = True
+    if args:
+        set_board_size(int(args[0]))
     start_gui()
\ No newline at end of file
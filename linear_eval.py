@@ -0,0 +1,266 @@
+import os
+import sys
+import json
+import time
+import argparse
+from array import array
+import numpy as np
+import Algorithm as Algo
+import batch_eval
+
+# Linear pattern-feature evaluator, an alternative to the hand-set SCORES
+#   python linear_eval.py train --games 400 --label-depth 2 --out linear_weights.json
+#
+# Every stone's 9-cell window along each direction (the windows of
+# evaluate_board) falls into one feature: the SCORES pattern it contains
+# (or none) times its room, the number of 5-cell segments through the
+# stone free of opponent stones and the edge (0-5). A position's feature
+# vector counts the player's windows per feature minus the opponent's, and
+# its score is the dot product with the weights.
+#
+# The weights are fitted offline: self-play positions are labelled by
+# searches with the pattern evaluator (does the side to move stand
+# better?) and a logistic regression (scikit-learn) is fitted on their
+# features. Since the score is a sum of per-window weights, the search uses
+# it as a pattern table (table()), with the same incremental evaluation and
+# move ordering as the SCORES table.
+
+PATTERNS = tuple(Algo.SCORES) + (None,)
+ROOMS = 6
+N_FEATURES = len(PATTERNS) * ROOMS
+# Weight of feature i is for PATTERNS[i // ROOMS] with room i % ROOMS
+
+# Fitted weights are scaled by this to engine score units
+WEIGHT_SCALE = 1000
+DEFAULT_WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linear_weights.json")
+
+def feature_name(i):
+    return f"{PATTERNS[i // ROOMS] or 'none'}/room{i % ROOMS}"
+
+def build_feature_table():
+    #Feature index of every possible 9-cell window code
+    codes = np.arange(Algo.PATTERN_WINDOWS)
+    digits = np.stack([(codes >> (2 * (8 - i))) & 3 for i in range(9)], axis=1)
+    blocked = digits >= 2
+    # Segments [s, s + 5) for s = 0..4 all contain the centre cell (4)
+    room = sum((~blocked[:, s:s + 5].any(axis=1)).astype(np.int64) for s in range(5))
+    index = {pattern: i for i, pattern in enumerate(PATTERNS)}
+    pattern = np.fromiter((index[Algo.pattern_string_class(''.join(map(str, window)))] for window in digits),
+                          dtype=np.int64, count=len(codes))
+    return (pattern * ROOMS + room).astype(np.int16)
+
+def feature_table_path():
+    #Cache file, keyed by the pattern rules and the feature definition
+    digest = Algo.code_digest(Algo.pattern_string_class, build_feature_table)
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__",
+                        f"linear_features_{digest}_{len(PATTERNS)}x{ROOMS}.npy")
+
+_feature_table = None
+
+def feature_table():
+    #build_feature_table, cached in memory and in __pycache__
+    global _feature_table
+    if _feature_table is None:
+        path = feature_table_path()
+        try:
+            _feature_table = np.load(path)
+        except (OSError, ValueError):
+            _feature_table = build_feature_table()
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+                np.save(tmp_path, _feature_table)
+                os.replace(tmp_path, path)
+            except OSError:
+                pass  # Read-only install: keep the table in memory only
+    return _feature_table
+
+_white_feature_table = None
+
+def white_feature_table():
+    #Feature of each window code read with own and opponent digits swapped
+    #(a code from Black's side gives White's feature)
+    global _white_feature_table
+    if _white_feature_table is None:
+        codes = np.arange(Algo.PATTERN_WINDOWS)
+        swapped = np.zeros_like(codes)
+        for i in range(9):
+            digit = (codes >> (2 * i)) & 3
+            swapped |= np.where(digit == 1, 2, np.where(digit == 2, 1, digit)) << (2 * i)
+        _white_feature_table = feature_table()[swapped]
+    return _white_feature_table
+
+def features(board, player):
+    #Feature counts of player's windows minus the opponent's
+    return features_batch([board], [player])[0]
+
+def features_batch(boards, players):
+    #features() of many same-size boards at once, one row per board
+    #Window codes are computed once, from Black's side; White's features
+    #come from the same codes through white_feature_table()
+    cells = np.asarray(boards, dtype=np.int64)
+    count = len(cells)
+    codes = batch_eval.window_codes(cells, Algo.Black)
+    # Feature ids offset by board, so one bincount counts every board
+    offsets = (np.arange(count) * N_FEATURES).reshape(count, 1, 1)
+    counts = {}
+    for colour, table in ((Algo.Black, feature_table()), (Algo.White, white_feature_table())):
+        ids = table[codes] + offsets
+        counts[colour] = np.bincount(ids[:, cells == colour].ravel(), minlength=count * N_FEATURES)
+    black = (counts[Algo.Black] - counts[Algo.White]).reshape(count, N_FEATURES)
+    sign = np.where(np.asarray(players) == Algo.Black, 1, -1).reshape(count, 1)
+    return black * sign
+
+class LinearEvaluator:
+    #Weights per feature, in engine score units
+
+    def __init__(self, weights):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self._table = None
+
+    @classmethod
+    def load(cls, path=DEFAULT_WEIGHTS_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        return cls([data["weights"][feature_name(i)] for i in range(N_FEATURES)])
+
+    def save(self, path, info=None):
+        data = {"weights": {feature_name(i): round(float(w), 1) for i, w in enumerate(self.weights)},
+                "info": info or {}}
+        with open(path, "w") as f:
+            json.dump(data, f, indent=1)
+
+    def evaluate(self, board, player):
+        #Same value as SearchBoard(board, self.table()).evaluate(player)
+        return int(features(board, player) @ self.table_weights())
+
+    def evaluate_batch(self, boards, players):
+        #evaluate() of many same-size boards at once
+        return features_batch(boards, players) @ self.table_weights()
+
+    def table_weights(self):
+        #Weights as the integers stored in the pattern table
+        return np.clip(np.rint(self.weights), -2 ** 31, 2 ** 31 - 1).astype(np.int64)
+
+    def table(self):
+        #Pattern table (array('i') over window codes) with each window's weight
+        if self._table is None:
+            self._table = array('i', self.table_weights()[feature_table()].astype(np.int32).tobytes())
+        return self._table
+
+_default = None
+
+def default_table():
+    #Pattern table of the shipped weights (Algorithm.evaluation_table("linear"))
+    global _default
+    if _default is None:
+        _default = LinearEvaluator.load()
+    return _default.table()
+
+# --- Training ---
+
+def self_play_records(games, depth, opening_stones, seed):
+    #Game records of quick self-play games from random openings
+    import match
+    engine = dict(match.DEFAULT_ENGINE, depth=depth, scores={})
+    openings = match.make_openings("random", games, opening_stones, seed)
+    for game in range(games):
+        yield match.play_game(game, ("a", engine), ("b", engine), openings[game // 2])
+
+def search_scores(positions, depth, workers=1, log=print):
+    #Search score of every (key, board, player, played) position for the
+    #side to move (None where there was nothing to search or the search failed)
+    import analyse
+    settings = {"depth": depth, "threats": False, "book": False}
+    started = time.perf_counter()
+    scores = []
+    for count, result in enumerate(analyse.analyse(iter(positions), settings, workers), 1):
+        scores.append(result.get("score"))
+        if log is not None and count % 500 == 0:
+            log(f"depth {depth}: {count}/{len(positions)} positions, "
+                f"{count / (time.perf_counter() - started):.1f}/s")
+    return scores
+
+def labelled_positions(records, label_depth, workers=1, log=print):
+    #Features of every position of the games and whether the side to move
+    #stands better. A fixed-depth search favours the side that moves last
+    #in it, so the label is the sign of the label_depth and label_depth + 1
+    #scores added together
+    import analyse
+    positions = [position for line, record in enumerate(records)
+                 for position in analyse.game_positions(record, line)]
+    even = search_scores(positions, label_depth, workers, log)
+    odd = search_scores(positions, label_depth + 1, workers, log)
+    rows = [i for i in range(len(positions)) if even[i] is not None and odd[i] is not None]
+    X = features_batch([positions[i][1] for i in rows], [positions[i][2] for i in rows])
+    y = np.array([even[i] + odd[i] > 0 for i in rows])
+    return X, y
+
+# Features are scaled by their pattern's SCORES value to this power for the
+# fit, so the regularisation keeps the hand-set order of the patterns
+# unless the data disagrees
+PRIOR_POWER = 0.75
+# Scale of the stone-difference column (cheap to use for the fit)
+STONES_COLUMN_SCALE = 10.0
+
+def prior_scale():
+    return np.array([Algo.SCORES[PATTERNS[i // ROOMS]] if PATTERNS[i // ROOMS] else 1.0
+                     for i in range(N_FEATURES)]) ** PRIOR_POWER
+
+def design(X):
+    #Fit inputs: scaled features and the stone difference. Black to move
+    #has as many stones as White, White to move one fewer; that column
+    #takes up which colour is to move, which the evaluator cannot use (the
+    #search evaluates every position from one side)
+    stones = X.sum(axis=1) / len(Algo.DIRECTIONS)
+    return np.column_stack([stones * STONES_COLUMN_SCALE, X * prior_scale()])
+
+def fit(X, y, C=1.0):
+    #Logistic regression without intercept (the evaluation is antisymmetric)
+    #Returns (weights in engine units, fitted model on design(X))
+    from sklearn.linear_model import LogisticRegression
+    model = LogisticRegression(fit_intercept=False, C=C, max_iter=50000)
+    model.fit(design(X), y)
+    weights = model.coef_[0][1:] * prior_scale() * WEIGHT_SCALE
+    # Fives only occur in finished games, which the search scores itself
+    five = [PATTERNS.index("five") * ROOMS + room for room in range(ROOMS)]
+    weights[five] = Algo.SCORES["five"]
+    return weights, model
+
+def train(games=400, play_depth=1, label_depth=2, opening_stones=4, seed=0, workers=1, test_fraction=0.2,
+          log=print):
+    #Fit a LinearEvaluator on self-play positions; returns it with a summary
+    X, y = labelled_positions(self_play_records(games, play_depth, opening_stones, seed), label_depth,
+                              workers, log)
+    X = X.astype(np.float64)
+    order = np.random.default_rng(seed).permutation(len(y))
+    split = int(len(y) * (1 - test_fraction))
+    train_rows, test_rows = order[:split], order[split:]
+    weights, model = fit(X[train_rows], y[train_rows])
+    info = {"positions": len(y), "games": games, "play_depth": play_depth, "label_depth": label_depth,
+            "train_accuracy": round(float(model.score(design(X[train_rows]), y[train_rows])), 4),
+            "test_accuracy": round(float(model.score(design(X[test_rows]), y[test_rows])), 4)}
+    return LinearEvaluator(weights), info
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Linear pattern-feature evaluator")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train_parser = sub.add_parser("train", help="fit weights on labelled self-play positions")
+    train_parser.add_argument("--games", type=int, default=400)
+    train_parser.add_argument("--play-depth", type=int, default=1, help="search depth of the self-play games")
+    train_parser.add_argument("--label-depth", type=int, default=2,
+                              help="labels come from searches at this depth and one deeper")
+    train_parser.add_argument("--opening-stones", type=int, default=4)
+    train_parser.add_argument("--seed", type=int, default=0)
+    train_parser.add_argument("--workers", type=int, default=1, help="labelling processes")
+    train_parser.add_argument("--out", default=DEFAULT_WEIGHTS_PATH)
+    args = parser.parse_args(argv)
+
+    evaluator, info = train(args.games, args.play_depth, args.label_depth, args.opening_stones, args.seed,
+                            args.workers)
+    evaluator.save(args.out, info)
+    print(json.dumps(info))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,55 +1,215 @@
 # Board constants
-BOARD_SIZE = 15
+BOARD_SIZE = 15  # default size; boards of other sizes work everywhere
 EMPTY = 0
 BLACK = 1
 WHITE = 2
 
-def initialize_board():
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+def initialize_board(size=BOARD_SIZE):
     #Create and return an empty board
     board = []
-    for _ in range(BOARD_SIZE):
-        row = [EMPTY] * BOARD_SIZE
+    for _ in range(size):
+        row = [EMPTY] * size
         board.append(row)
     return board
 
 def is_board_full(board):
     #Check if board has no empty spaces
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
-            if board[r][c] == EMPTY:
-                return False
+    for row in board:
+        if EMPTY in row:
+            return False
     return True
 
 def check_win(board, r, c, player):
     #Check if player has won with a move at (r,c)
-    directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-    
-    for dr, dc in directions:
+    for forward, backward in geometry(len(board)).rays[r][c]:
         count = 1
         
         # Forward direction
-        for i in range(1, 5):
-            nr = r + dr * i
-            nc = c + dc * i
-            if not (0 <= nr < BOARD_SIZE and 0 <= nc < BOARD_SIZE):
-                break
-            if board[nr][nc] == player:
-                count += 1
-            else:
+        for nr, nc in forward:
+            if board[nr][nc] != player:
                 break
+            count += 1
         
         # Backward direction
-        for i in range(1, 5):
-            nr = r - dr * i
-            nc = c - dc * i
-            if not (0 <= nr < BOARD_SIZE and 0 <= nc < BOARD_SIZE):
-                break
-            if board[nr][nc] == player:
-                count += 1
-            else:
+        for nr, nc in backward:
+            if board[nr][nc] != player:
                 break
+            count += 1
         
         if count >= 5:
             return True
     
-    return False
\ No newline at end of file
+    return False
+
+# --- Per-size board geometry ---
+# Cells along lines and around each cell, computed once per board size so
+# the hot loops need no bounds checks
+
+class BoardGeometry:
+    #Tables for one board size:
+    #rays[r][c][d]: (forward, backward) cells up to 4 steps along DIRECTIONS[d]
+    #windows[r][c][d]: (edge_code, ((nr, nc, weight), ...)) for the 9-cell
+    #  window centred on (r, c); off-board cells contribute 3 * weight to
+    #  edge_code (see Algorithm.get_line_code)
+    #window_cells[r][c]: (nr, nc, d) for the other cells of those windows
+    #neighbourhood(radius)[r][c]: cells within radius, without (r, c)
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = size * size
+        cells = range(size)
+        self.rays = [[[self._ray(r, c, dr, dc) for dr, dc in DIRECTIONS] for c in cells] for r in cells]
+        self.windows = [[[self._window(r, c, dr, dc) for dr, dc in DIRECTIONS] for c in cells] for r in cells]
+        self.window_cells = [[[(nr, nc, d) for d in range(len(DIRECTIONS))
+                               for nr, nc, _ in self.windows[r][c][d][1] if (nr, nc) != (r, c)]
+                              for c in cells] for r in cells]
+        self._neighbourhoods = {}
+
+        # Bitboard layout: one padding column per row (see BitBoard)
+        self.stride = size + 1
+        self.shifts = (1, self.stride, self.stride + 1, self.stride - 1)
+        self.win_masks = self._build_win_masks()
+
+    def on_board(self, r, c):
+        return 0 <= r < self.size and 0 <= c < self.size
+
+    def _ray(self, r, c, dr, dc):
+        forward = [(r + dr * i, c + dc * i) for i in range(1, 5) if self.on_board(r + dr * i, c + dc * i)]
+        backward = [(r - dr * i, c - dc * i) for i in range(1, 5) if self.on_board(r - dr * i, c - dc * i)]
+        return forward, backward
+
+    def _window(self, r, c, dr, dc):
+        edge_code = 0
+        cells = []
+        for i in range(-4, 5):
+            weight = 4 ** (4 - i)
+            nr, nc = r + dr * i, c + dc * i
+            if self.on_board(nr, nc):
+                cells.append((nr, nc, weight))
+            else:
+                edge_code += 3 * weight
+        return edge_code, tuple(cells)
+
+    def neighbourhood(self, radius):
+        table = self._neighbourhoods.get(radius)
+        if table is None:
+            offsets = [(dr, dc) for dr in range(-radius, radius + 1) for dc in range(-radius, radius + 1) if dr or dc]
+            table = [[[(r + dr, c + dc) for dr, dc in offsets if self.on_board(r + dr, c + dc)]
+                      for c in range(self.size)] for r in range(self.size)]
+            self._neighbourhoods[radius] = table
+        return table
+
+    def _build_win_masks(self):
+        #For each cell and direction, the start bits of every five through it
+        masks = []
+        for r in range(self.size):
+            for c in range(self.size):
+                cell_masks = []
+                for dr, dc in DIRECTIONS:
+                    mask = 0
+                    for k in range(5):
+                        sr, sc = r - dr * k, c - dc * k
+                        if self.on_board(sr, sc) and self.on_board(sr + dr * 4, sc + dc * 4):
+                            mask |= 1 << (sr * self.stride + sc)
+                    cell_masks.append(mask)
+                masks.append(cell_masks)
+        return masks
+
+_geometries = {}
+
+def geometry(size):
+    #BoardGeometry for this size, built on first use
+    table = _geometries.get(size)
+    if table is None:
+        table = _geometries[size] = BoardGeometry(size)
+    return table
+
+# --- Bitboard representation ---
+# One Python int per colour, bit (r * stride + c). Each row has one extra
+# always-empty padding column, so shifting along a line never wraps from
+# the end of one row into the next.
+
+def _five_starts(bits, shift):
+    #Bits where a five-in-a-row starts along one direction (shift and AND)
+    pairs = bits & (bits >> shift)
+    fours = pairs & (pairs >> (2 * shift))
+    return fours & (bits >> (4 * shift))
+
+class BitBoard:
+    #Alternative board type: one bitboard per colour plus a move counter
+    #Use from_list()/to_list() to convert from and to the list-of-lists board
+
+    def __init__(self, size=BOARD_SIZE):
+        self.geometry = geometry(size)
+        self.bits = {BLACK: 0, WHITE: 0}
+        self.move_count = 0
+
+    @classmethod
+    def from_list(cls, board):
+        #Build a bitboard from a list board of any size
+        bb = cls(len(board))
+        for r, row in enumerate(board):
+            for c, cell in enumerate(row):
+                if cell != EMPTY:
+                    bb.place(r, c, cell)
+        return bb
+
+    def to_list(self):
+        #Convert back to the list-of-lists board
+        stride = self.geometry.stride
+        board = initialize_board(self.geometry.size)
+        for player in (BLACK, WHITE):
+            bits = self.bits[player]
+            while bits:
+                low = bits & -bits
+                index = low.bit_length() - 1
+                board[index // stride][index % stride] = player
+                bits ^= low
+        return board
+
+    def get(self, r, c):
+        bit = 1 << (r * self.geometry.stride + c)
+        if self.bits[BLACK] & bit:
+            return BLACK
+        if self.bits[WHITE] & bit:
+            return WHITE
+        return EMPTY
+
+    def place(self, r, c, player):
+        self.bits[player] |= 1 << (r * self.geometry.stride + c)
+        self.move_count += 1
+
+    def remove(self, r, c):
+        bit = 1 << (r * self.geometry.stride + c)
+        for player in (BLACK, WHITE):
+            if self.bits[player] & bit:
+                self.bits[player] ^= bit
+                self.move_count -= 1
+
+    def has_five(self, player):
+        #True if player has five in a row anywhere
+        bits = self.bits[player]
+        for shift in self.geometry.shifts:
+            if _five_starts(bits, shift):
+                return True
+        return False
+
+    def check_win(self, r, c, player):
+        #Same as check_win(board, r, c, player): a five through (r, c),
+        #counting (r, c) itself as the player's stone
+        geo = self.geometry
+        bits = self.bits[player] | (1 << (r * geo.stride + c))
+        masks = geo.win_masks[r * geo.size + c]
+        for d, shift in enumerate(geo.shifts):
+            if _five_starts(bits, shift) & masks[d]:
+                return True
+        return False
+
+    def is_board_full(self):
+        return self.move_count == self.geometry.cells
+
+    def is_game_over(self):
+        #Win for either colour or full board
+        return self.has_five(BLACK) or self.has_five(WHITE) or self.is_board_full()
@@ -0,0 +1,252 @@
+import sys
+import json
+import random
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import Algorithm as Algo
+import logic
+
+# Headless engine-vs-engine matches
+#   python match.py --a depth=2 --b depth=3 --games 200 --workers 4 --out games.jsonl
+#
+# An engine is a comma-separated list of settings:
+#   depth=3         find_best_move max_depth
+#   time=500        time limit per move in ms (default: none)
+#   radius=1        SEARCH_RADIUS
+#   threats=0       turn the VCF/VCT pre-pass off
+#   eval=linear     evaluator (Algorithm.EVALUATORS, default pattern)
+#   selective=1     selective move generation with SELECTIVE_WIDTHS, or
+#                   widths per depth such as selective=6/8/10
+#   book=1          use the opening book (off by default, it was built
+#                   with the default settings)
+#   <score>=<n>     override a SCORES entry, e.g. live_three=2000
+#
+# Games are played in pairs from the same opening with colours swapped.
+# Each finished game is written as one JSON line:
+#   {"game", "black", "white", "size", "opening": [[r, c], ...],
+#    "moves": [[r, c, think_ms, depth, nodes], ...], "winner": "a"/"b"/null}
+# ("size" is the board size, --size; analyse.py reads the records)
+
+DEFAULT_SCORES = dict(Algo.SCORES)
+DEFAULT_ENGINE = {"depth": 2, "time": None, "radius": Algo.SEARCH_RADIUS, "threats": True, "book": False,
+                  "eval": "pattern", "selective": False, "scores": {}}
+
+def parse_engine(spec):
+    #Engine settings from a "key=value,..." string
+    engine = dict(DEFAULT_ENGINE, scores={})
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"engine setting {item!r} is not key=value")
+        if key in ("depth", "time", "radius"):
+            engine[key] = int(value)
+        elif key in ("threats", "book"):
+            engine[key] = value not in ("0", "false", "no", "off")
+        elif key == "eval":
+            if value not in Algo.EVALUATORS:
+                raise ValueError(f"unknown evaluator {value!r}")
+            engine[key] = value
+        elif key == "selective":
+            if "/" in value:
+                engine[key] = tuple(int(width) for width in value.split("/"))
+            else:
+                engine[key] = value not in ("0", "false", "no", "off")
+        elif key in DEFAULT_SCORES:
+            engine["scores"][key] = int(value)
+        else:
+            raise ValueError(f"unknown engine setting {key!r}")
+    return engine
+
+# Pattern tables of the SCORES variants used in this process
+_tables = {}
+
+def apply_engine(engine):
+    #Switch the module-level engine settings to this engine
+    Algo.SEARCH_RADIUS = engine["radius"]
+    scores = dict(DEFAULT_SCORES, **engine["scores"])
+    if Algo.SCORES != scores:
+        Algo.SCORES.clear()
+        Algo.SCORES.update(scores)
+        key = tuple(sorted(scores.items()))
+        if key not in _tables:
+            _tables[key] = Algo.load_pattern_table()
+        Algo.PATTERN_TABLE = _tables[key]
+
+def random_opening(rng, stones, size=Algo.BOARD_SIZE):
+    #Alternating stones on distinct cells near the centre (within 3 of it,
+    #clipped to the board)
+    centre = size // 2
+    near = range(max(0, centre - 3), min(size, centre + 4))
+    cells = [(r, c) for r in near for c in near]
+    rng.shuffle(cells)
+    return cells[:stones]
+
+def book_opening(rng, stones, size=Algo.BOARD_SIZE):
+    #Black starts in the centre; the side to move plays a random neighbour
+    #of the last stone or the book move, with equal chance, so the line
+    #stays inside the book (whose positions include every such reply)
+    import book
+    board = logic.initialize_board(size)
+    player = Algo.Black
+    moves = []
+    for _ in range(stones):
+        move = book.book_move(board, player) if moves and rng.random() < 0.5 else None
+        if move is None:
+            r0, c0 = moves[-1] if moves else (size // 2, size // 2)
+            replies = [(r, c) for r in range(r0 - 1, r0 + 2) for c in range(c0 - 1, c0 + 2)
+                       if 0 <= r < size and 0 <= c < size and board[r][c] == Algo.Empty]
+            move = rng.choice(replies)
+        board[move[0]][move[1]] = player
+        moves.append(move)
+        player = Algo.White if player == Algo.Black else Algo.Black
+    return moves
+
+def make_openings(kind, games, stones, seed, size=Algo.BOARD_SIZE):
+    #One opening per pair of games
+    rng = random.Random(seed)
+    make = book_opening if kind == "book" else random_opening
+    return [make(rng, stones, size) for _ in range((games + 1) // 2)]
+
+def play_game(game, black, white, opening, size=Algo.BOARD_SIZE):
+    #Play one game; black and white are (name, engine settings)
+    #Returns the game record (see the top of this file)
+    board = logic.initialize_board(size)
+    max_moves = size * size
+    player = Algo.Black
+    winner = None
+    for r, c in opening:
+        board[r][c] = player
+        player = Algo.White if player == Algo.Black else Algo.Black
+
+    sides = {Algo.Black: black, Algo.White: white}
+    tables = {Algo.Black: Algo.TranspositionTable(), Algo.White: Algo.TranspositionTable()}
+    moves = []
+    while len(opening) + len(moves) < max_moves:
+        name, engine = sides[player]
+        apply_engine(engine)
+        stats = Algo.SearchStats()
+        move = Algo.find_best_move(board, player, max_depth=engine["depth"], tt=tables[player],
+                                   time_limit_ms=engine["time"], threat_search=engine["threats"],
+                                   use_book=engine["book"], stats=stats, evaluator=engine.get("eval"),
+                                   selective=engine.get("selective", False))
+        if move is None:
+            break
+        r, c = move
+        moves.append([r, c, round(stats.elapsed * 1000, 1), stats.depth, stats.nodes])
+        if logic.check_win(board, r, c, player):
+            board[r][c] = player
+            winner = name
+            break
+        board[r][c] = player
+        player = Algo.White if player == Algo.Black else Algo.Black
+
+    return {"game": game, "black": black[0], "white": white[0], "size": size,
+            "opening": [list(m) for m in opening], "moves": moves, "winner": winner}
+
+def schedule(engine_a, engine_b, openings, games, size=Algo.BOARD_SIZE):
+    #(game, black, white, opening, size) for every game, colours swapped per pair
+    a = ("a", engine_a)
+    b = ("b", engine_b)
+    for game in range(games):
+        opening = openings[game // 2]
+        yield (game, a, b, opening, size) if game % 2 == 0 else (game, b, a, opening, size)
+
+class MatchSummary:
+    #Running totals over finished game records
+
+    def __init__(self):
+        self.games = 0
+        self.wins = {"a": 0, "b": 0}
+        self.draws = 0
+        self.think_ms = {"a": 0.0, "b": 0.0}
+        self.moves = {"a": 0, "b": 0}
+        self.black_wins = 0
+
+    def add(self, record):
+        self.games += 1
+        if record["winner"] is None:
+            self.draws += 1
+        else:
+            self.wins[record["winner"]] += 1
+            if record["winner"] == record["black"]:
+                self.black_wins += 1
+        sides = (record["black"], record["white"])
+        for i, move in enumerate(record["moves"]):
+            name = sides[(len(record["opening"]) + i) % 2]
+            self.think_ms[name] += move[2]
+            self.moves[name] += 1
+
+    def score(self, name):
+        #Points per game (win 1, draw 0.5)
+        return (self.wins[name] + 0.5 * self.draws) / self.games if self.games else 0.0
+
+    def average_think_ms(self, name):
+        return self.think_ms[name] / self.moves[name] if self.moves[name] else 0.0
+
+    def report(self):
+        lines = [f"{self.games} games: a {self.wins['a']} wins, b {self.wins['b']} wins, {self.draws} draws, "
+                 f"black won {self.black_wins}"]
+        for name in ("a", "b"):
+            lines.append(f"  {name}: score {self.score(name):.3f}, "
+                         f"average think {self.average_think_ms(name):.1f} ms over {self.moves[name]} moves")
+        return "\n".join(lines)
+
+def run_match(engine_a, engine_b, games, workers=1, opening="random", opening_stones=2, seed=0,
+              out=None, log=print, size=Algo.BOARD_SIZE):
+    #Play games between engines a and b; records are written to out (a
+    #file object) as they finish. Returns the MatchSummary
+    if not 5 <= size <= Algo.MAX_BOARD_SIZE:
+        raise ValueError(f"board sizes from 5 to {Algo.MAX_BOARD_SIZE} are supported")
+    openings = make_openings(opening, games, opening_stones, seed, size)
+    summary = MatchSummary()
+    started = time.perf_counter()
+
+    def finish(record):
+        summary.add(record)
+        if out is not None:
+            out.write(json.dumps(record, separators=(",", ":")) + "\n")
+            out.flush()
+        if log is not None and (summary.games % 10 == 0 or summary.games == games):
+            log(f"{summary.games}/{games} games, a score {summary.score('a'):.3f}, "
+                f"{time.perf_counter() - started:.0f} s")
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(play_game, *args) for args in schedule(engine_a, engine_b, openings, games, size)]
+            for future in as_completed(futures):
+                finish(future.result())
+    else:
+        for args in schedule(engine_a, engine_b, openings, games, size):
+            finish(play_game(*args))
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play engine-vs-engine games without the GUI")
+    parser.add_argument("--a", default="", help="settings of engine a, e.g. depth=2,radius=1")
+    parser.add_argument("--b", default="", help="settings of engine b")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="games played in parallel")
+    parser.add_argument("--opening", choices=("random", "book"), default="random")
+    parser.add_argument("--opening-stones", type=int, default=2, help="stones placed before the engines play")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=int, default=Algo.BOARD_SIZE, help="board size")
+    parser.add_argument("--out", help="append game records to this JSON-lines file")
+    args = parser.parse_args(argv)
+    if not 5 <= args.size <= Algo.MAX_BOARD_SIZE:
+        parser.error(f"board sizes from 5 to {Algo.MAX_BOARD_SIZE} are supported")
+
+    engine_a = parse_engine(args.a)
+    engine_b = parse_engine(args.b)
+    if args.out:
+        with open(args.out, "a") as out:
+            summary = run_match(engine_a, engine_b, args.games, args.workers, args.opening,
+                                args.opening_stones, args.seed, out, size=args.size)
+    else:
+        summary = run_match(engine_a, engine_b, args.games, args.workers, args.opening,
+                            args.opening_stones, args.seed, size=args.size)
+    print(summary.report())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
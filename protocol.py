@@ -0,0 +1,219 @@
+import sys
+import time
+import threading
+import argparse
+import Algorithm as Algo
+import logic
+
+# Gomocup-style text protocol on stdin/stdout, for match managers and
+# other engines. Coordinates are "x,y" with x the column and y the row.
+#   python protocol.py
+#
+# Commands: START size, RESTART, BEGIN, TURN x,y, BOARD ... DONE,
+# INFO key value (timeout_turn, timeout_match, time_left), TAKEBACK x,y,
+# ABOUT, END. Only the engine modules are imported here (no tkinter/PIL).
+
+ABOUT = 'name="AI-Assignment", version="1.0", author="group 11", country="MY"'
+
+# Search depth cap; the time manager decides where the search stops
+MAX_DEPTH = 10
+
+# Clock handling (all in ms)
+DEFAULT_TIMEOUT_TURN = 30000
+SAFETY_MS = 60           # answer this long before the turn or match limit
+MIN_MOVE_MS = 20
+GAME_STONES = 120        # stones a game is expected to last
+MIN_MOVES_TO_GO = 8
+HARD_FACTOR = 3          # a move may use this many shares when needed
+SOFT_FRACTION = 0.4      # no new depth after this part of the hard limit
+
+class TimeManager:
+    #Splits the remaining match time over the expected remaining moves
+    #budget() gives (soft, hard) limits: after soft no new depth is
+    #started, at hard the search is stopped
+
+    def __init__(self):
+        self.timeout_turn = DEFAULT_TIMEOUT_TURN
+        self.timeout_match = 0   # 0: no match limit
+        self.time_left = None
+
+    def info(self, key, value):
+        #Apply an INFO line; returns False if the key is not a clock setting
+        if key not in ("timeout_turn", "timeout_match", "time_left"):
+            return False
+        setattr(self, key, int(value))
+        return True
+
+    def budget(self, stones):
+        hard = self.timeout_turn - SAFETY_MS if self.timeout_turn > 0 else MIN_MOVE_MS
+        soft = hard
+        if self.timeout_match > 0 and self.time_left is not None:
+            moves_to_go = max(MIN_MOVES_TO_GO, (GAME_STONES - stones) // 2)
+            share = self.time_left / moves_to_go
+            soft = min(soft, share)
+            hard = min(hard, share * HARD_FACTOR, self.time_left / 2 - SAFETY_MS)
+        hard = max(MIN_MOVE_MS, hard)
+        return min(soft, hard * SOFT_FRACTION), hard
+
+    def spent(self, ms):
+        #Our own estimate until the manager sends time_left again
+        if self.time_left is not None:
+            self.time_left = max(0, self.time_left - int(ms))
+
+class ProtocolEngine:
+    #Board, clock and search state of one protocol session
+
+    def __init__(self, out=sys.stdout, messages=False):
+        self.out = out
+        self.messages = messages
+        self.clock = TimeManager()
+        self.tt = Algo.TranspositionTable()
+        self.heuristics = Algo.MoveHeuristics()
+        self.size = Algo.BOARD_SIZE
+        self.reset()
+
+    def reset(self):
+        self.board = logic.initialize_board(self.size)
+        self.me = None  # our colour, known once someone has moved
+        self.tt.clear()
+        self.heuristics.clear(self.size)
+
+    def send(self, line):
+        self.out.write(line + "\n")
+        self.out.flush()
+
+    def opponent(self):
+        return Algo.White if self.me == Algo.Black else Algo.Black
+
+    def place(self, x, y, player):
+        if not (0 <= x < self.size and 0 <= y < self.size) or self.board[y][x] != Algo.Empty:
+            raise ValueError(f"invalid move {x},{y}")
+        self.board[y][x] = player
+
+    def take_back(self, x, y):
+        if not (0 <= x < self.size and 0 <= y < self.size) or self.board[y][x] == Algo.Empty:
+            raise ValueError(f"invalid takeback {x},{y}")
+        self.board[y][x] = Algo.Empty
+
+    def think(self):
+        #Search our move, play it and send it
+        stones = sum(cell != Algo.Empty for row in self.board for cell in row)
+        soft, hard = self.clock.budget(stones)
+        started = time.perf_counter()
+        stop = threading.Event()
+        timer = threading.Timer(hard / 1000.0, stop.set)
+        timer.start()
+
+        def on_progress(stats):
+            # A finished depth past the soft limit: the next one would not
+            # finish in time anyway
+            if stats.depth == stats.searching_depth and (time.perf_counter() - started) * 1000 >= soft:
+                stop.set()
+
+        stats = Algo.SearchStats()
+        try:
+            move = Algo.find_best_move(self.board, self.me, max_depth=MAX_DEPTH, stop_event=stop, tt=self.tt,
+                                       stats=stats, on_progress=on_progress, heuristics=self.heuristics)
+        finally:
+            timer.cancel()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.clock.spent(elapsed)
+        if move is None:
+            self.send("ERROR no move available")
+            return
+        r, c = move
+        self.board[r][c] = self.me
+        if self.messages:
+            self.send(f"MESSAGE {stats.source} depth {stats.depth} score {stats.score} "
+                      f"nodes {stats.nodes} {elapsed:.0f} ms (budget {soft:.0f}/{hard:.0f})")
+        self.send(f"{c},{r}")
+
+    def handle(self, line, lines):
+        #Handle one command; lines gives the following input lines (BOARD).
+        #Returns False after END
+        words = line.strip().split(None, 1)
+        if not words:
+            return True
+        command = words[0].upper()
+        args = words[1] if len(words) > 1 else ""
+
+        if command == "END":
+            return False
+        if command == "START":
+            size = int(args)
+            if not 5 <= size <= Algo.MAX_BOARD_SIZE:
+                self.send(f"ERROR board sizes from 5 to {Algo.MAX_BOARD_SIZE} are supported")
+                return True
+            self.size = size
+            self.reset()
+            warm_up()
+            self.send("OK")
+        elif command == "RESTART":
+            self.reset()
+            self.send("OK")
+        elif command == "INFO":
+            key, _, value = args.partition(" ")
+            try:
+                self.clock.info(key.lower(), value)
+            except ValueError:
+                pass  # Unused or malformed INFO values are ignored
+        elif command == "BEGIN":
+            self.me = Algo.Black
+            self.think()
+        elif command == "TURN":
+            x, y = (int(v) for v in args.split(","))
+            if self.me is None:
+                self.me = Algo.White
+            self.place(x, y, self.opponent())
+            self.think()
+        elif command == "BOARD":
+            fields = []
+            for board_line in lines:
+                if board_line.strip().upper() == "DONE":
+                    break
+                x, y, field = (int(v) for v in board_line.split(","))
+                fields.append((x, y, field))
+            own = sum(field == 1 for _, _, field in fields)
+            other = sum(field == 2 for _, _, field in fields)
+            self.board = logic.initialize_board(self.size)
+            self.me = Algo.Black if own == other else Algo.White
+            for x, y, field in fields:
+                if field in (1, 2):
+                    self.place(x, y, self.me if field == 1 else self.opponent())
+            self.think()
+        elif command == "TAKEBACK":
+            x, y = (int(v) for v in args.split(","))
+            self.take_back(x, y)
+            self.send("OK")
+        elif command == "ABOUT":
+            self.send(ABOUT)
+        else:
+            self.send(f"UNKNOWN {command}")
+        return True
+
+def warm_up():
+    #Import the lazily loaded search parts before the clock runs
+    import threats
+    import book
+    book.default_book()
+    Algo.batch_scorer()
+
+def run(stdin=sys.stdin, stdout=sys.stdout, messages=False):
+    engine = ProtocolEngine(stdout, messages)
+    lines = iter(stdin.readline, "")
+    for line in lines:
+        try:
+            if not engine.handle(line, lines):
+                break
+        except ValueError as e:
+            engine.send(f"ERROR {e}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gomocup-style protocol engine on stdin/stdout")
+    parser.add_argument("--messages", action="store_true", help="send a MESSAGE line with search info per move")
+    args = parser.parse_args(argv)
+    run(messages=args.messages)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,524 @@
+import sys
+import json
+import time
+import random
+import signal
+import asyncio
+import argparse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import Algorithm as Algo
+import logic
+
+# Multi-game AI service: many game sessions in one asyncio server, searches
+# run in a process pool
+#   python service.py serve --port 7777 --workers 4
+#   python service.py load --port 7777 --players 20 --moves 15
+#
+# JSON lines over TCP (or a Unix socket with --unix PATH). Every request
+# may carry an "id", which is copied into its response. Requests on one
+# connection are handled concurrently, so responses can arrive out of order.
+#   {"op": "new", "size": 15, "depth": 3, "deadline_ms": 5000}
+#                                -> {"ok": true, "game": 1}
+#   {"op": "move", "game": 1, "r": 7, "c": 7}
+#                                -> {"ok": true, "winner": null}
+#       places a stone for the side to move; a search still running for
+#       the game is stale now and is cancelled
+#   {"op": "search", "game": 1, "play": true, "deadline_ms": 2000}
+#                                -> {"ok": true, "move": [r, c], "score",
+#                                    "depth", "nodes", "ms", "winner"}
+#       best move for the side to move, played unless "play" is false
+#   {"op": "state", "game": 1}   board, side to move, winner
+#   {"op": "end", "game": 1}     drop the game
+#   {"op": "stats"}              queue depth, latency percentiles, throughput
+# Failures answer {"ok": false, "error": ...}; "busy" (too many searches
+# queued), "deadline" and "cancelled" are the ones a client should expect.
+#
+# Games are owned by their connection and dropped when it closes. Worker
+# processes keep one TT and MoveHeuristics for all games (TT entries are
+# keyed by position and board size, so games do not disturb each other's results).
+
+DEFAULT_PORT = 7777
+DEFAULT_DEADLINE_MS = 5000
+DEADLINE_MARGIN_MS = 50     # the search stops this long before the deadline
+DEADLINE_GRACE_S = 0.5      # answer "deadline" if a worker overruns by this
+PENDING_PER_WORKER = 4      # admission control: searches queued or running
+CANCEL_SLOTS = 4096         # ring of cancelled search ids shared with workers
+LATENCY_SAMPLES = 2000
+THROUGHPUT_WINDOW_S = 60.0
+
+# --- Worker processes ---
+
+_service_worker = {}
+
+def _init_service_worker(cancelled):
+    _service_worker["cancelled"] = cancelled
+    _service_worker["tt"] = Algo.TranspositionTable()
+    _service_worker["heuristics"] = Algo.MoveHeuristics()
+
+class _CancelFlag:
+    #is_set() view of one search id in the shared cancel ring
+
+    def __init__(self, search_id):
+        self.search_id = search_id
+        self.slot = search_id % CANCEL_SLOTS
+
+    def is_set(self):
+        return _service_worker["cancelled"][self.slot] == self.search_id
+
+def _search_task(search_id, board, player, depth, deadline):
+    #One search in a worker; deadline is a time.time() value
+    stop = _CancelFlag(search_id)
+    remaining_ms = (deadline - time.time()) * 1000 - DEADLINE_MARGIN_MS
+    if remaining_ms <= 0:
+        return {"expired": True}
+    if stop.is_set():
+        return {"cancelled": True}
+    heuristics = _service_worker["heuristics"]
+    if heuristics.size != len(board):
+        heuristics.clear(len(board))
+    stats = Algo.SearchStats()
+    move = Algo.find_best_move(board, player, max_depth=depth, stop_event=stop, tt=_service_worker["tt"],
+                               time_limit_ms=remaining_ms, stats=stats, heuristics=heuristics)
+    return {"move": move, "score": stats.score, "depth": stats.depth, "nodes": stats.nodes,
+            "ms": round(stats.elapsed * 1000, 1), "source": stats.source, "cancelled": stop.is_set()}
+
+# --- Server ---
+
+def percentile(sorted_values, fraction):
+    #Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+class Metrics:
+    #Search counters, recent latencies and completion times
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.counts = {"admitted": 0, "completed": 0, "busy": 0, "deadline": 0, "cancelled": 0, "errors": 0}
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.completions = deque()
+
+    def completed(self, seconds):
+        now = time.monotonic()
+        self.counts["completed"] += 1
+        self.latencies.append(seconds)
+        self.completions.append(now)
+
+    def throughput(self):
+        #Completed searches per second over the last THROUGHPUT_WINDOW_S
+        now = time.monotonic()
+        while self.completions and self.completions[0] < now - THROUGHPUT_WINDOW_S:
+            self.completions.popleft()
+        window = min(THROUGHPUT_WINDOW_S, now - self.started)
+        return len(self.completions) / window if window > 0 else 0.0
+
+    def snapshot(self, in_flight, workers, games):
+        latencies = sorted(self.latencies)
+        ms = lambda fraction: None if not latencies else round(percentile(latencies, fraction) * 1000, 1)
+        return dict(self.counts, games=games, in_flight=in_flight, queued=max(0, in_flight - workers),
+                    latency_ms={"p50": ms(0.5), "p90": ms(0.9), "p99": ms(0.99),
+                                "max": ms(1.0)},
+                    searches_per_second=round(self.throughput(), 2))
+
+class GameSession:
+    #Board and search state of one hosted game
+
+    def __init__(self, game_id, size, depth, deadline_ms):
+        self.id = game_id
+        self.size = size
+        self.depth = depth
+        self.deadline_ms = deadline_ms
+        self.board = logic.initialize_board(size)
+        self.to_move = Algo.Black
+        self.stones = 0
+        self.winner = None
+        self.version = 0        # bumped by every move, searches of older versions are stale
+        self.pending = None     # (search id, concurrent future) of the running search
+
+    def place(self, r, c):
+        if self.winner is not None:
+            raise ValueError("game is over")
+        if not (0 <= r < self.size and 0 <= c < self.size) or self.board[r][c] != Algo.Empty:
+            raise ValueError(f"invalid move {r},{c}")
+        player = self.to_move
+        self.board[r][c] = player
+        self.stones += 1
+        self.version += 1
+        self.to_move = Algo.White if player == Algo.Black else Algo.Black
+        if logic.check_win(self.board, r, c, player):
+            self.winner = player
+        elif self.stones == self.size * self.size:
+            self.winner = Algo.Empty  # draw
+
+class GameService:
+    #Game sessions, the search pool and the metrics of one server
+
+    def __init__(self, workers=1, max_pending=None, depth=3, deadline_ms=DEFAULT_DEADLINE_MS):
+        ctx = multiprocessing.get_context()
+        self.cancelled = ctx.RawArray('q', CANCEL_SLOTS)
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                            initializer=_init_service_worker, initargs=(self.cancelled,))
+        self.workers = workers
+        self.max_pending = max_pending or workers * PENDING_PER_WORKER
+        self.depth = depth
+        self.deadline_ms = deadline_ms
+        self.games = {}
+        self.next_game = 1
+        self.next_search = 1
+        self.in_flight = 0
+        self.metrics = Metrics()
+
+    def close(self):
+        for game in self.games.values():
+            self.cancel(game)
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        return self.metrics.snapshot(self.in_flight, self.workers, len(self.games))
+
+    def cancel(self, game):
+        #Stop the game's search: drop it from the queue, or flag it for
+        #the worker running it
+        if game.pending is not None:
+            search_id, future = game.pending
+            self.cancelled[search_id % CANCEL_SLOTS] = search_id
+            future.cancel()
+            game.pending = None
+
+    def game(self, request, owned):
+        #The request's game; games of other connections are unknown here
+        game = self.games.get(request.get("game"))
+        if game is None or game.id not in owned:
+            raise ValueError(f"unknown game {request.get('game')!r}")
+        return game
+
+    async def handle(self, request, owned):
+        #Answer one request; owned is the set of game ids of the connection
+        op = request.get("op")
+        if op == "new":
+            size = int(request.get("size", Algo.BOARD_SIZE))
+            if not 5 <= size <= Algo.MAX_BOARD_SIZE:
+                raise ValueError(f"board sizes from 5 to {Algo.MAX_BOARD_SIZE} are supported")
+            game = GameSession(self.next_game, size, int(request.get("depth", self.depth)),
+                               int(request.get("deadline_ms", self.deadline_ms)))
+            self.next_game += 1
+            self.games[game.id] = game
+            owned.add(game.id)
+            return {"ok": True, "game": game.id}
+        if op == "move":
+            game = self.game(request, owned)
+            self.cancel(game)
+            game.place(int(request["r"]), int(request["c"]))
+            return {"ok": True, "winner": game.winner}
+        if op == "search":
+            return await self.search(self.game(request, owned), request)
+        if op == "state":
+            game = self.game(request, owned)
+            return {"ok": True, "board": game.board, "to_move": game.to_move, "winner": game.winner,
+                    "searching": game.pending is not None}
+        if op == "end":
+            game = self.game(request, owned)
+            self.cancel(game)
+            del self.games[game.id]
+            owned.discard(game.id)
+            return {"ok": True}
+        if op == "stats":
+            return dict(self.stats(), ok=True)
+        raise ValueError(f"unknown op {op!r}")
+
+    async def search(self, game, request):
+        if game.winner is not None:
+            raise ValueError("game is over")
+        # A newer search of the same game replaces the old one
+        self.cancel(game)
+        if self.in_flight >= self.max_pending:
+            self.metrics.counts["busy"] += 1
+            return {"ok": False, "error": "busy"}
+
+        loop = asyncio.get_running_loop()
+        received = time.monotonic()
+        deadline_ms = int(request.get("deadline_ms", game.deadline_ms))
+        search_id = self.next_search
+        self.next_search += 1
+        version = game.version
+        try:
+            future = self.executor.submit(_search_task, search_id, [row[:] for row in game.board], game.to_move,
+                                          game.depth, time.time() + deadline_ms / 1000.0)
+        except Exception as e:
+            # Pool broken or shut down
+            return self.search_failed(e)
+        self.in_flight += 1
+        self.metrics.counts["admitted"] += 1
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._search_done))
+        game.pending = (search_id, future)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), deadline_ms / 1000.0 + DEADLINE_GRACE_S)
+        except asyncio.TimeoutError:
+            self.cancelled[search_id % CANCEL_SLOTS] = search_id
+            result = {"expired": True}
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            result = {"cancelled": True}
+        except Exception as e:
+            # The search raised or its worker died (BrokenProcessPool)
+            return self.search_failed(e)
+        finally:
+            if game.pending is not None and game.pending[0] == search_id:
+                game.pending = None
+
+        if result.get("expired"):
+            self.metrics.counts["deadline"] += 1
+            return {"ok": False, "error": "deadline"}
+        if result.get("cancelled") or game.version != version or game.id not in self.games:
+            self.metrics.counts["cancelled"] += 1
+            return {"ok": False, "error": "cancelled"}
+        move = result["move"]
+        if move is not None and request.get("play", True):
+            game.place(*move)
+        self.metrics.completed(time.monotonic() - received)
+        return {"ok": True, "move": list(move) if move is not None else None, "score": result["score"],
+                "depth": result["depth"], "nodes": result["nodes"], "ms": result["ms"],
+                "source": result["source"], "winner": game.winner}
+
+    def search_failed(self, e):
+        #Answer for a search that raised instead of returning a result
+        self.metrics.counts["errors"] += 1
+        return {"ok": False, "error": f"search failed: {type(e).__name__}: {e}"}
+
+    def _search_done(self):
+        self.in_flight -= 1
+
+    async def respond(self, request, owned, writer):
+        try:
+            response = await self.handle(request, owned)
+        except (ValueError, KeyError, TypeError) as e:
+            self.metrics.counts["errors"] += 1
+            response = {"ok": False, "error": str(e)}
+        if "id" in request:
+            response["id"] = request["id"]
+        if writer.is_closing():
+            return
+        writer.write((json.dumps(response, separators=(",", ":")) + "\n").encode())
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def serve_client(self, reader, writer):
+        #One connection: requests are answered concurrently, its games are
+        #dropped when it closes
+        owned = set()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = {}
+                if not isinstance(request, dict):
+                    request = {}
+                task = asyncio.create_task(self.respond(request, owned, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in owned:
+                game = self.games.pop(game_id, None)
+                if game is not None:
+                    self.cancel(game)
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+async def serve(service, host="127.0.0.1", port=DEFAULT_PORT, unix=None, log_every=None, log=print):
+    #Run the server until cancelled
+    if unix:
+        server = await asyncio.start_unix_server(service.serve_client, path=unix)
+    else:
+        server = await asyncio.start_server(service.serve_client, host, port)
+    if log is not None:
+        log(f"serving on {unix or f'{host}:{port}'} with {service.workers} workers, "
+            f"at most {service.max_pending} searches in flight")
+    async with server:
+        if log_every and log is not None:
+            while True:
+                await asyncio.sleep(log_every)
+                log(json.dumps(service.stats()))
+        else:
+            await server.serve_forever()
+
+# --- Load-test client ---
+
+class Client:
+    #JSON-lines connection; request() waits for the response with its id
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.waiting = {}
+        self.next_id = 1
+        self.reader_task = asyncio.create_task(self.read_responses())
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=DEFAULT_PORT, unix=None):
+        if unix:
+            reader, writer = await asyncio.open_unix_connection(unix)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def read_responses(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self.waiting.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self.waiting.values():
+            future.set_exception(ConnectionError("connection closed"))
+
+    async def request(self, **request):
+        request["id"] = self.next_id
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request["id"]] = future
+        self.writer.write((json.dumps(request) + "\n").encode())
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        self.reader_task.cancel()
+
+def random_reply(board, rng):
+    #A random empty cell next to a stone (the centre on an empty board)
+    size = len(board)
+    cells = [(r + dr, c + dc) for r in range(size) for c in range(size) if board[r][c] != Algo.Empty
+             for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+    cells = [(r, c) for r, c in cells if 0 <= r < size and 0 <= c < size and board[r][c] == Algo.Empty]
+    return rng.choice(cells) if cells else (size // 2, size // 2)
+
+async def simulated_player(connect, moves, depth, deadline_ms, impatience, rng, results):
+    #Play one game against the service: a random move near the stones,
+    #then the AI's answer. With probability impatience the player moves
+    #again (for the AI) before the answer arrives, which cancels the search
+    #The server places every stone for its side to move, so if the search
+    #finished first that move is played as Black; the board and side to
+    #move are read back with "state" after every round
+    client = await connect()
+    try:
+        game = (await client.request(op="new", depth=depth, deadline_ms=deadline_ms))["game"]
+        for _ in range(moves):
+            state = await client.request(op="state", game=game)
+            board = state["board"]
+            if state["winner"] is not None:
+                break
+            if state["to_move"] == Algo.Black:
+                r, c = random_reply(board, rng)
+                response = await client.request(op="move", game=game, r=r, c=c)
+                if not response["ok"]:
+                    results["move failed"] = results.get("move failed", 0) + 1
+                    break
+                if response["winner"] is not None:
+                    break
+                board[r][c] = Algo.Black
+            started = time.monotonic()
+            search = asyncio.create_task(client.request(op="search", game=game))
+            if rng.random() < impatience:
+                await asyncio.sleep(0.01)
+                if not search.done():
+                    r, c = random_reply(board, rng)
+                    response = await client.request(op="move", game=game, r=r, c=c)
+                    if not response["ok"]:
+                        # The answer took the cell first; the state read resyncs
+                        results["move failed"] = results.get("move failed", 0) + 1
+            response = await search
+            if response["ok"]:
+                results["latencies"].append(time.monotonic() - started)
+            else:
+                results[response["error"]] = results.get(response["error"], 0) + 1
+                if response["error"] != "cancelled":
+                    break
+        results["games"] += 1
+        await client.request(op="end", game=game)
+    finally:
+        await client.close()
+
+async def load_test(players, moves, depth, deadline_ms, impatience=0.0, seed=0, host="127.0.0.1",
+                    port=DEFAULT_PORT, unix=None, log=print):
+    #Run players concurrent games against a running service and report
+    #client-side latencies, throughput and the server's own stats
+    connect = lambda: Client.connect(host, port, unix)
+    results = {"latencies": [], "games": 0}
+    started = time.monotonic()
+    await asyncio.gather(*(simulated_player(connect, moves, depth, deadline_ms, impatience,
+                                            random.Random(seed + i), results) for i in range(players)))
+    elapsed = time.monotonic() - started
+    latencies = sorted(results.pop("latencies"))
+    ms = lambda fraction: percentile(latencies, fraction) * 1000 if latencies else 0.0
+    log(f"{players} players, {results.pop('games')} games, {len(latencies)} searches in {elapsed:.1f} s, "
+        f"{len(latencies) / elapsed:.1f} searches/s")
+    log(f"  client latency ms: p50 {ms(0.5):.0f}, p90 {ms(0.9):.0f}, p99 {ms(0.99):.0f}, max {ms(1.0):.0f}")
+    if results:
+        log(f"  failed searches: {results}")
+    client = await connect()
+    log(f"  server: {json.dumps(await client.request(op='stats'))}")
+    await client.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-game AI service and its load-test client")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("serve", "load"):
+        p = sub.add_parser(name)
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, default=DEFAULT_PORT)
+        p.add_argument("--unix", help="Unix socket path instead of TCP")
+        p.add_argument("--depth", type=int, default=3, help="search depth (serve: default for new games)")
+        p.add_argument("--deadline-ms", type=int, default=DEFAULT_DEADLINE_MS)
+    serve_parser = sub.choices["serve"]
+    serve_parser.add_argument("--workers", type=int, default=1, help="search processes")
+    serve_parser.add_argument("--max-pending", type=int, default=None,
+                              help=f"searches queued or running before answering busy "
+                                   f"(default {PENDING_PER_WORKER} per worker)")
+    serve_parser.add_argument("--log-every", type=float, default=None, help="print stats every this many seconds")
+    load_parser = sub.choices["load"]
+    load_parser.add_argument("--players", type=int, default=10, help="concurrent games")
+    load_parser.add_argument("--moves", type=int, default=10, help="player moves per game")
+    load_parser.add_argument("--impatience", type=float, default=0.0,
+                             help="chance of moving again before the AI answers")
+    load_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "load":
+        asyncio.run(load_test(args.players, args.moves, args.depth, args.deadline_ms, args.impatience, args.seed,
+                              args.host, args.port, args.unix))
+        return 0
+    service = GameService(args.workers, args.max_pending, args.depth, args.deadline_ms)
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, terminate)
+    log = lambda text: print(text, file=sys.stderr, flush=True)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix, args.log_every, log))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import json
+import unittest
+import analyse
+
+# A bad input line gives an error result in its place and the run goes on
+
+GOOD = json.dumps({"size": 9, "moves": [[4, 4], [4, 5]]})
+BAD = [
+    "not json",
+    json.dumps([1, 2]),
+    json.dumps({"size": 9, "moves": [[4, 4], [9, 0]]}),
+    json.dumps({"size": 9, "moves": [[4, 4], [4, 4]]}),
+    json.dumps({"size": 9, "opening": [[4, 4]], "moves": [[4, 4]]}),
+    json.dumps({"size": 40, "moves": [[4, 4]]}),
+    json.dumps({"board": [[0] * 40 for _ in range(40)]}),
+    json.dumps({"board": [[0] * 9 for _ in range(8)]}),
+    json.dumps({"board": [[0] * 9 for _ in range(9)], "player": 3}),
+]
+
+class AnalyseTest(unittest.TestCase):
+
+    def run_lines(self, lines, workers=1):
+        settings = {"depth": 1, "threats": False, "book": False}
+        return list(analyse.analyse(analyse.read_positions(lines), settings, workers))
+
+    def check(self, workers):
+        lines = [GOOD] + BAD + [GOOD]
+        results = self.run_lines(lines, workers)
+        self.assertEqual([result["line"] for result in results], [0, 0] + list(range(1, len(BAD) + 1)) + [10, 10])
+        for result in results[2:-2]:
+            self.assertEqual(set(result), {"line", "error"})
+        for result in results[:2] + results[-2:]:
+            self.assertNotIn("error", result)
+            self.assertIsNotNone(result["move"])
+
+    def test_bad_lines(self):
+        self.check(workers=1)
+
+    def test_bad_lines_in_pool(self):
+        self.check(workers=2)
+
+    def test_failed_search(self):
+        #A position that makes the search raise is answered with an error
+        positions = [((0, 0), None, 1, None), ((1, 0), [[0] * 9 for _ in range(9)], 1, None)]
+        results = list(analyse.analyse(iter(positions), {"depth": 1}))
+        self.assertEqual(results[0]["line"], 0)
+        self.assertIn("search failed", results[0]["error"])
+        self.assertNotIn("error", results[1])
+
+if __name__ == "__main__":
+    unittest.main()
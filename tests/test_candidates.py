@@ -0,0 +1,71 @@
+import random
+import unittest
+import Algorithm as Algo
+import logic
+
+# CandidateTracker must follow generate_candidate_moves through random
+# place/remove sequences, including the empty board (centre only)
+
+class CandidateTrackerTest(unittest.TestCase):
+
+    def check(self, board, tracker):
+        self.assertEqual(tracker.candidate_moves(), Algo.generate_candidate_moves(board))
+
+    def fuzz(self, size, seed, steps=300):
+        rng = random.Random(seed)
+        board = logic.initialize_board(size)
+        tracker = Algo.CandidateTracker(board)
+        placed = []
+        self.check(board, tracker)
+        for _ in range(steps):
+            if placed and rng.random() < 0.4:
+                r, c = placed.pop(rng.randrange(len(placed)))
+                board[r][c] = Algo.Empty
+                tracker.remove(r, c)
+            else:
+                empty = [(r, c) for r in range(size) for c in range(size) if board[r][c] == Algo.Empty]
+                if not empty:
+                    break
+                r, c = rng.choice(empty)
+                board[r][c] = rng.choice((Algo.Black, Algo.White))
+                tracker.place(r, c)
+                placed.append((r, c))
+            self.check(board, tracker)
+        # Take every stone off again: back to the centre move
+        while placed:
+            r, c = placed.pop()
+            board[r][c] = Algo.Empty
+            tracker.remove(r, c)
+            self.check(board, tracker)
+        self.assertEqual(tracker.candidate_moves(), [(size // 2, size // 2)])
+
+    def test_fuzz_place_remove(self):
+        for seed in range(5):
+            self.fuzz(Algo.BOARD_SIZE, seed)
+
+    def test_fuzz_other_board_sizes(self):
+        for size in (5, 19):
+            self.fuzz(size, size)
+
+    def test_empty_board_centre(self):
+        for size in (5, Algo.BOARD_SIZE, 19):
+            board = logic.initialize_board(size)
+            self.assertEqual(Algo.CandidateTracker(board).candidate_moves(), [(size // 2, size // 2)])
+            self.assertEqual(Algo.generate_candidate_moves(board), [(size // 2, size // 2)])
+
+    def test_search_board_make_unmake(self):
+        rng = random.Random(7)
+        board = logic.initialize_board(Algo.BOARD_SIZE)
+        position = Algo.SearchBoard(board)
+        moves = []
+        for _ in range(40):
+            r, c = rng.choice(position.candidate_moves())
+            position.make_move(r, c, Algo.Black if len(moves) % 2 == 0 else Algo.White)
+            moves.append((r, c))
+            self.assertEqual(position.candidate_moves(), Algo.generate_candidate_moves(board))
+        while moves:
+            position.unmake_move(*moves.pop())
+            self.assertEqual(position.candidate_moves(), Algo.generate_candidate_moves(board))
+
+if __name__ == "__main__":
+    unittest.main()
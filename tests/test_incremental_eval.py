@@ -0,0 +1,79 @@
+import random
+import unittest
+import Algorithm as Algo
+import logic
+
+# IncrementalEvaluator must give the same numbers as evaluate_board, and
+# both must agree with the string rules (get_line_pattern + pattern_to_score)
+#   python -m pytest tests      (or: python -m unittest discover tests)
+
+class IncrementalEvaluatorTest(unittest.TestCase):
+
+    def check(self, board, evaluator):
+        for player in (Algo.Black, Algo.White):
+            self.assertEqual(evaluator.evaluate(player), Algo.evaluate_board(board, player))
+
+    def string_evaluate(self, board, player):
+        #evaluate_board through the reference string-matching path
+        score = 0
+        for r in range(len(board)):
+            for c in range(len(board)):
+                stone = board[r][c]
+                if stone != Algo.Empty:
+                    total = sum(Algo.pattern_to_score(Algo.get_line_pattern(board, r, c, dr, dc, stone))
+                                for dr, dc in Algo.DIRECTIONS)
+                    score += total if stone == player else -total
+        return score
+
+    def random_sequence(self, size, seed, steps=150):
+        #Random make/unmake sequence, checked after every step
+        rng = random.Random(seed)
+        board = logic.initialize_board(size)
+        evaluator = Algo.IncrementalEvaluator(board)
+        placed = []
+        self.check(board, evaluator)
+        for _ in range(steps):
+            if placed and rng.random() < 0.35:
+                r, c = placed.pop(rng.randrange(len(placed)))
+                evaluator.unmake_move(r, c)
+            else:
+                empty = [(r, c) for r in range(size) for c in range(size) if board[r][c] == Algo.Empty]
+                if not empty:
+                    break
+                r, c = rng.choice(empty)
+                evaluator.make_move(r, c, rng.choice((Algo.Black, Algo.White)))
+                placed.append((r, c))
+            self.check(board, evaluator)
+
+    def test_random_make_unmake(self):
+        for seed in range(5):
+            self.random_sequence(Algo.BOARD_SIZE, seed)
+
+    def test_other_board_sizes(self):
+        for size in (7, 19):
+            self.random_sequence(size, size)
+
+    def test_built_from_existing_position(self):
+        rng = random.Random(42)
+        board = logic.initialize_board(Algo.BOARD_SIZE)
+        cells = rng.sample([(r, c) for r in range(Algo.BOARD_SIZE) for c in range(Algo.BOARD_SIZE)], 60)
+        for i, (r, c) in enumerate(cells):
+            board[r][c] = Algo.Black if i % 2 == 0 else Algo.White
+        self.check(board, Algo.IncrementalEvaluator(board))
+
+    def test_string_reference(self):
+        #The table path must not only agree with itself
+        for seed, size in ((0, Algo.BOARD_SIZE), (1, Algo.BOARD_SIZE), (2, 9), (3, 19)):
+            rng = random.Random(seed)
+            board = logic.initialize_board(size)
+            cells = rng.sample([(r, c) for r in range(size) for c in range(size)], size * 3)
+            for i, (r, c) in enumerate(cells):
+                board[r][c] = Algo.Black if i % 2 == 0 else Algo.White
+            evaluator = Algo.IncrementalEvaluator(board)
+            for player in (Algo.Black, Algo.White):
+                expected = self.string_evaluate(board, player)
+                self.assertEqual(Algo.evaluate_board(board, player), expected)
+                self.assertEqual(evaluator.evaluate(player), expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import random
+import unittest
+import Algorithm as Algo
+import match
+
+# Openings stay on the board for every supported size, and unsupported
+# sizes are refused before any game starts
+
+class MatchTest(unittest.TestCase):
+
+    def test_random_opening_on_board(self):
+        for size in range(5, Algo.MAX_BOARD_SIZE + 1):
+            cells = match.random_opening(random.Random(size), 20, size=size)
+            self.assertEqual(len(set(cells)), 20)
+            for r, c in cells:
+                self.assertTrue(0 <= r < size and 0 <= c < size, (size, r, c))
+
+    def test_unsupported_size(self):
+        for size in (4, Algo.MAX_BOARD_SIZE + 1):
+            with self.assertRaises(ValueError):
+                match.run_match({}, {}, 2, size=size, log=lambda *args: None)
+            with self.assertRaises(SystemExit):
+                match.main(["--size", str(size)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import Algorithm as Algo
+import benchmark
+
+# The root-parallel search returns the serial move, also from a pool kept
+# across searches (warm worker TTs and heuristics)
+
+def positions():
+    #Openings, tactics, midgames and near-full boards
+    return benchmark.benchmark_corpus().items()
+
+def best_move(player, board, depth, **options):
+    return Algo.find_best_move([row[:] for row in board], player, max_depth=depth,
+                               threat_search=False, use_book=False, **options)
+
+class ParallelSearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.serial = {(name, depth): best_move(player, board, depth, workers=1)
+                      for depth in (2, 3) for name, (player, board) in positions()}
+
+    def test_workers_match_serial(self):
+        for depth in (2, 3):
+            for name, (player, board) in positions():
+                with self.subTest(position=name, depth=depth):
+                    self.assertEqual(best_move(player, board, depth, workers=2), self.serial[name, depth])
+
+    def test_persistent_pool_matches_serial(self):
+        #Every search after the first starts with the TTs of the ones before,
+        #the second depth 3 round with deeper entries of the same positions
+        pool = Algo.RootPool(2)
+        try:
+            for depth in (2, 3, 3):
+                for name, (player, board) in positions():
+                    with self.subTest(position=name, depth=depth):
+                        self.assertEqual(best_move(player, board, depth, pool=pool), self.serial[name, depth])
+        finally:
+            pool.close()
+
+if __name__ == "__main__":
+    unittest.main()
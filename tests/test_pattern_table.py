@@ -0,0 +1,18 @@
+import itertools
+import unittest
+import Algorithm as Algo
+
+# PATTERN_TABLE must hold the string-rule score of every 9-cell window
+# (4^9 codes, in the order get_line_code builds them)
+
+class PatternTableTest(unittest.TestCase):
+
+    def test_table_matches_string_rules(self):
+        self.assertEqual(len(Algo.PATTERN_TABLE), 4 ** 9)
+        for code, cells in enumerate(itertools.product((0, 1, 2, 3), repeat=9)):
+            expected = Algo.pattern_to_score(list(cells))
+            if Algo.PATTERN_TABLE[code] != expected:
+                self.fail(f"window {cells}: table {Algo.PATTERN_TABLE[code]} != {expected}")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import io
+import unittest
+import protocol
+
+# Malformed commands answer ERROR and leave the engine running
+
+class ProtocolTest(unittest.TestCase):
+
+    def run_lines(self, *lines):
+        out = io.StringIO()
+        protocol.run(io.StringIO("".join(line + "\n" for line in lines)), out)
+        return out.getvalue().splitlines()
+
+    def test_takeback_out_of_range(self):
+        lines = self.run_lines("START 15", "TAKEBACK 20,20", "TAKEBACK -1,0", "ABOUT", "END")
+        self.assertEqual(lines[:3], ["OK", "ERROR invalid takeback 20,20", "ERROR invalid takeback -1,0"])
+        self.assertEqual(lines[3], protocol.ABOUT)
+
+    def test_takeback_empty_cell(self):
+        lines = self.run_lines("START 15", "TAKEBACK 3,3", "END")
+        self.assertEqual(lines, ["OK", "ERROR invalid takeback 3,3"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+import Algorithm as Algo
+import benchmark
+
+# A TT kept across searches with different selective widths must not hand
+# scores of one setting to the other
+
+class SelectiveSearchTest(unittest.TestCase):
+
+    def best_move(self, player, board, selective, tt=None):
+        return Algo.find_best_move([row[:] for row in board], player, max_depth=3, tt=tt,
+                                   threat_search=False, use_book=False, selective=selective)
+
+    def test_tt_reused_across_widths(self):
+        for name, (player, board) in benchmark.benchmark_corpus().items():
+            for first, second in ((True, False), (False, True)):
+                with self.subTest(position=name, first=first):
+                    tt = Algo.TranspositionTable()
+                    self.best_move(player, board, first, tt)
+                    self.assertEqual(self.best_move(player, board, second, tt),
+                                     self.best_move(player, board, second))
+
+if __name__ == "__main__":
+    unittest.main()
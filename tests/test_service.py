@@ -0,0 +1,57 @@
+import asyncio
+import unittest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+import service
+
+# Games belong to the connection that created them, and a failed search
+# is still answered
+
+class BrokenExecutor:
+    #Stands in for a pool whose worker died
+    def submit(self, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, **kwargs):
+        pass
+
+class GameServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = service.GameService(workers=1, depth=1)
+
+    def tearDown(self):
+        self.service.close()
+
+    def request(self, owned, **request):
+        async def respond():
+            try:
+                return await self.service.handle(request, owned)
+            except ValueError as e:
+                return {"ok": False, "error": str(e)}
+        return asyncio.run(respond())
+
+    def test_games_of_other_connections_are_unknown(self):
+        first, second = set(), set()
+        game = self.request(first, op="new")["game"]
+        for op in ("move", "search", "state", "end"):
+            response = self.request(second, op=op, game=game, r=7, c=7)
+            self.assertEqual(response, {"ok": False, "error": f"unknown game {game!r}"})
+        self.assertTrue(self.request(first, op="move", game=game, r=7, c=7)["ok"])
+        self.assertTrue(self.request(first, op="end", game=game)["ok"])
+
+    def test_failed_search_is_answered(self):
+        owned = set()
+        game = self.request(owned, op="new")["game"]
+        self.request(owned, op="move", game=game, r=7, c=7)
+        self.service.executor.shutdown(wait=True)
+        self.service.executor = BrokenExecutor()
+        response = self.request(owned, op="search", game=game)
+        self.assertFalse(response["ok"])
+        self.assertIn("BrokenProcessPool", response["error"])
+        self.assertEqual(self.service.metrics.counts["errors"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import random
+import unittest
+import Algorithm as Algo
+import logic
+
+# SearchBoard keys follow zobrist_key through make/unmake, and boards of
+# different sizes never share keys (their TT entries would be wrong)
+
+class ZobristTest(unittest.TestCase):
+
+    def test_board_size_in_key(self):
+        keys = set()
+        for size in range(5, Algo.MAX_BOARD_SIZE + 1):
+            board = logic.initialize_board(size)
+            board[2][2] = Algo.Black
+            board[3][3] = Algo.White
+            keys.add(Algo.zobrist_key(board))
+            keys.add(Algo.SearchBoard(board).node_key(Algo.Black))
+        self.assertEqual(len(keys), Algo.MAX_BOARD_SIZE + 1 - 5)
+
+    def test_make_unmake(self):
+        rng = random.Random(3)
+        for size in (9, Algo.BOARD_SIZE, 19):
+            board = logic.initialize_board(size)
+            position = Algo.SearchBoard(board)
+            moves = []
+            for i in range(30):
+                r, c = rng.choice(position.candidate_moves())
+                position.make_move(r, c, Algo.Black if i % 2 == 0 else Algo.White)
+                moves.append((r, c))
+                self.assertEqual(position.key, Algo.zobrist_key(board))
+            while moves:
+                position.unmake_move(*moves.pop())
+                self.assertEqual(position.key, Algo.zobrist_key(board))
+
+if __name__ == "__main__":
+    unittest.main()
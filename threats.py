@@ -0,0 +1,306 @@
+import itertools
+from array import array
+import logic
+import Algorithm as Algo
+
+# Threat-space search: victory by continuous fours (VCF), then by fours
+# and open threes (VCT). Runs before the full-width search and only
+# answers when it can prove a win or finds a move that must be played.
+
+# Threat kinds made by a move, named after the SCORES categories
+NO_THREAT = 0
+LIVE_THREE = 1   # can become a live four next move
+FOUR = 2         # exactly one cell completes five (four_with_gap)
+LIVE_FOUR = 3    # two or more cells complete five
+
+# Search limits (attacker moves and total nodes per threat_move call)
+VCF_DEPTH = 10
+VCT_DEPTH = 4
+THREAT_NODE_LIMIT = 20000
+THREAT_TIME_LIMIT_MS = 250
+
+CENTRE = 4 ** 4
+
+# How often the pre-pass decided the move (see threat_move)
+STATS = {"calls": 0, "immediate_win": 0, "forced_block": 0, "vcf": 0, "vct": 0,
+         "searched": 0, "node_limit": 0, "nodes": 0}
+
+def reset_stats():
+    for key in STATS:
+        STATS[key] = 0
+
+def stats():
+    #STATS plus the share of calls that skipped the main search
+    result = dict(STATS)
+    skipped = STATS["calls"] - STATS["searched"]
+    result["skip_rate"] = skipped / STATS["calls"] if STATS["calls"] else 0.0
+    return result
+
+# --- Window tables ---
+# Indexed by get_line_code() of a window whose centre is the player's stone.
+# Bit j stands for the cell at offset j - 4 along the line.
+
+def _five_mask(s):
+    #Empty cells that complete five through the centre
+    mask = 0
+    for start in range(5):
+        span = s[start:start + 5]
+        if span.count('1') == 4 and span.count('0') == 1:
+            mask |= 1 << (start + span.index('0'))
+    return mask
+
+def _build_threat_tables():
+    five = array('H', [0]) * Algo.PATTERN_WINDOWS
+    four = array('H', [0]) * Algo.PATTERN_WINDOWS
+    codes = []
+    for cells in itertools.product('0123', repeat=8):
+        s = ''.join(cells[:4]) + '1' + ''.join(cells[4:])
+        code = int(s, 4)
+        five[code] = _five_mask(s)
+        codes.append((code, s))
+    for code, s in codes:
+        # Empty cells that would turn this window into a live four
+        mask = 0
+        for j in range(9):
+            if s[j] == '0' and bin(five[code + 4 ** (8 - j)]).count('1') >= 2:
+                mask |= 1 << j
+        four[code] = mask
+    return five, four
+
+FIVE_MASK, FOUR_MASK = _build_threat_tables()
+MASK_OFFSETS = [[j - 4 for j in range(9) if mask >> j & 1] for mask in range(512)]
+
+def move_threat(board, r, c, player):
+    #Threat made by player on the empty cell (r, c)
+    #Returns (kind, five_cells, four_cells): cells completing five after the
+    #move, and cells that would then make a live four
+    fives = set()
+    fours = []
+    windows = logic.geometry(len(board)).windows[r][c]
+    for d, (dr, dc) in enumerate(Algo.DIRECTIONS):
+        code = Algo.window_code(board, windows[d], player) + CENTRE
+        for k in MASK_OFFSETS[FIVE_MASK[code]]:
+            fives.add((r + dr * k, c + dc * k))
+        for k in MASK_OFFSETS[FOUR_MASK[code]]:
+            fours.append((r + dr * k, c + dc * k))
+    if len(fives) >= 2:
+        return LIVE_FOUR, fives, fours
+    if fives:
+        return FOUR, fives, fours
+    if fours:
+        return LIVE_THREE, fives, fours
+    return NO_THREAT, fives, fours
+
+# --- Selective move generation ---
+# Used by the main search when Algorithm.SearchBoard.widths is set (see
+# find_best_move selective=...)
+
+FIVE_COUNT = [bin(mask).count('1') for mask in range(512)]
+
+def cell_threats(board, windows, player):
+    #Cheap local threat of a stone on an empty cell, for player and for the
+    #opponent, from the cell's windows (one pass computes both codes)
+    #Returns (own score, own fives, their score, their fives): PATTERN_TABLE
+    #score over the four directions and the number of cells that would then
+    #complete five (2 or more: a live four or a double four)
+    table = Algo.PATTERN_TABLE
+    own_score = own_fives = their_score = their_fives = 0
+    for edge_code, cells in windows:
+        own = their = edge_code + CENTRE
+        for r, c, weight in cells:
+            cell = board[r][c]
+            if cell == player:
+                own += weight
+                their += 2 * weight
+            elif cell != Algo.Empty:
+                own += 2 * weight
+                their += weight
+        own_score += table[own]
+        own_fives += FIVE_COUNT[FIVE_MASK[own]]
+        their_score += table[their]
+        their_fives += FIVE_COUNT[FIVE_MASK[their]]
+    return own_score, own_fives, their_score, their_fives
+
+def selective_moves(board, moves, player, width):
+    #Moves to search for player (to move) out of the candidate moves
+    #  own five                    the winning cells only
+    #  opponent four               the cells that block it
+    #  opponent open three         cells that stop its live fours, and
+    #                              player's own fours
+    #  otherwise                   the width best cells by own threat score
+    #                              plus the opponent's (attack and defence)
+    #Moves keep their candidate order
+    opponent = Algo.White if player == Algo.Black else Algo.Black
+    geometry = logic.geometry(len(board)).windows
+    five = Algo.SCORES["five"]
+    wins = []
+    blocks = []
+    fours = set()
+    three_blocks = set()
+    scored = []
+    for index, (r, c) in enumerate(moves):
+        own, own_fives, theirs, their_fives = cell_threats(board, geometry[r][c], player)
+        if own >= five:
+            wins.append((r, c))
+        elif theirs >= five:
+            blocks.append((r, c))
+        if own_fives:
+            fours.add((r, c))
+        if their_fives >= 2:
+            # Opponent's live four (or double four) next move: this cell
+            # and the cells it would then complete five on
+            three_blocks.add((r, c))
+            three_blocks.update(move_threat(board, r, c, opponent)[1])
+        scored.append((-(own + theirs), index))
+    if wins:
+        return wins
+    if blocks:
+        return blocks
+    if three_blocks:
+        # Five cells lie next to the opponent's stones, so all are candidates
+        return [move for move in moves if move in three_blocks or move in fours]
+    scored.sort()
+    keep = sorted(index for _, index in scored[:width])
+    return [moves[i] for i in keep]
+
+class _NodeLimit(Exception):
+    pass
+
+class ThreatSearch:
+    #Narrow attacker-to-move search over fours (and optionally threes)
+
+    def __init__(self, board, attacker, max_nodes=THREAT_NODE_LIMIT, stop_event=None):
+        self.board = board
+        self.attacker = attacker
+        self.defender = Algo.White if attacker == Algo.Black else Algo.Black
+        self.tracker = Algo.CandidateTracker(board)
+        self.max_nodes = max_nodes
+        self.stop_event = stop_event
+        self.nodes = 0
+
+    def place(self, r, c, player):
+        self.board[r][c] = player
+        self.tracker.place(r, c)
+
+    def remove(self, r, c):
+        self.board[r][c] = Algo.Empty
+        self.tracker.remove(r, c)
+
+    def five_cells(self, player):
+        #Cells where player would complete five right now
+        return [(r, c) for r, c in self.tracker.candidate_moves() if logic.check_win(self.board, r, c, player)]
+
+    def threat_moves(self, player, allow_threes):
+        #(kind, move, five_cells, four_cells) for player's threat moves, strongest first
+        moves = []
+        for r, c in self.tracker.candidate_moves():
+            kind, fives, fours = move_threat(self.board, r, c, player)
+            if kind >= FOUR or (allow_threes and kind == LIVE_THREE):
+                moves.append((kind, (r, c), fives, fours))
+        moves.sort(key=lambda m: -m[0])
+        return moves
+
+    def attack(self, depth, allow_threes):
+        #Winning first move for the attacker (to move), or None
+        self.nodes += 1
+        if self.nodes > self.max_nodes or (self.stop_event is not None and self.stop_event.is_set()):
+            raise _NodeLimit()
+
+        wins = self.five_cells(self.attacker)
+        if wins:
+            return wins[0]
+        if depth == 0:
+            return None
+
+        # A defender four must be blocked, and the block has to be a threat
+        # itself for the attack to keep the initiative
+        must_block = self.five_cells(self.defender)
+        if len(must_block) > 1:
+            return None
+
+        for kind, move, fives, fours in self.threat_moves(self.attacker, allow_threes and not must_block):
+            if must_block and move != must_block[0]:
+                continue
+            r, c = move
+            self.place(r, c, self.attacker)
+            try:
+                if kind == LIVE_FOUR:
+                    won = True  # The defender has no five and cannot block twice
+                elif kind == FOUR:
+                    won = self._forced_reply(next(iter(fives)), depth, allow_threes)
+                else:
+                    won = self._all_replies_lose(fours, depth)
+            finally:
+                self.remove(r, c)
+            if won:
+                return move
+        return None
+
+    def _forced_reply(self, block, depth, allow_threes):
+        #Defender blocks the only five cell; True if the attack still wins
+        r, c = block
+        if logic.check_win(self.board, r, c, self.defender):
+            return False
+        self.place(r, c, self.defender)
+        try:
+            return self.attack(depth - 1, allow_threes) is not None
+        finally:
+            self.remove(r, c)
+
+    def _all_replies_lose(self, four_cells, depth):
+        #After an open three: the defender may take any cell of the live
+        #fours it threatens (or their five cells), or counter with a four
+        replies = set()
+        for r, c in four_cells:
+            replies.add((r, c))
+            replies.update(move_threat(self.board, r, c, self.attacker)[1])
+        for kind, move, _, _ in self.threat_moves(self.defender, False):
+            replies.add(move)
+
+        for r, c in sorted(replies):
+            if logic.check_win(self.board, r, c, self.defender):
+                return False
+            self.place(r, c, self.defender)
+            try:
+                won = self.attack(depth - 1, True) is not None
+            finally:
+                self.remove(r, c)
+            if not won:
+                return False
+        return True
+
+def threat_move(board, player, max_nodes=THREAT_NODE_LIMIT, time_limit_ms=THREAT_TIME_LIMIT_MS,
+                stop_event=None):
+    #Move that wins or must be played, or None to run the full search
+    #Checks, in order: own five, opponent four to block, VCF, VCT
+    STATS["calls"] += 1
+    search = ThreatSearch([row[:] for row in board], player, max_nodes,
+                          Algo.SearchDeadline(stop_event, time_limit_ms))
+
+    wins = search.five_cells(player)
+    if wins:
+        STATS["immediate_win"] += 1
+        return wins[0]
+
+    blocks = search.five_cells(search.defender)
+    if blocks:
+        # Any other move loses at once (two blocks means the game is lost anyway)
+        STATS["forced_block"] += 1
+        return blocks[0]
+
+    try:
+        move = search.attack(VCF_DEPTH, False)
+        if move is not None:
+            STATS["vcf"] += 1
+            return move
+        move = search.attack(VCT_DEPTH, True)
+        if move is not None:
+            STATS["vct"] += 1
+            return move
+    except _NodeLimit:
+        STATS["node_limit"] += 1
+    finally:
+        STATS["nodes"] += search.nodes
+
+    STATS["searched"] += 1
+    return None